@@ -9,6 +9,10 @@ from fastapi import FastAPI
 # Routers
 from api import base_agent, text_inbound, voice_inbound, telegram_inbound, voice_outbound, authentication
 
+# Project
+from jeeves.agency.chat_history.database import ensure_indexes
+from jeeves.agency import embedding_cache
+
 
 app = FastAPI(
     title="Jeeves Backend API",
@@ -16,6 +20,13 @@ app = FastAPI(
 )
 
 
+@app.on_event("startup")
+async def create_indexes():
+    """Make sure database indexes exist before serving requests."""
+    ensure_indexes()
+    embedding_cache.ensure_indexes()
+
+
 @app.get("/", status_code=200)
 async def test():
     return "API alive and well."
@@ -0,0 +1,4 @@
+"""
+Performance benchmarks, run as modules from the repository root, ex.
+`python -m benchmarks.wordhunt`. Not collected by pytest.
+"""
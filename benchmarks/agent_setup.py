@@ -0,0 +1,60 @@
+"""
+Benchmark per-message agent setup. Compares building the agent from scratch around
+prompts with the run's values rendered in, as every message used to, with creating
+an executor around the agent shared by every run with the same toolset. Uses the
+base agent's tools, so no user or network calls are needed.
+"""
+import time
+
+from jeeves import agency
+from jeeves.agency import prompts, tool_auth
+
+
+RUNS = 200
+
+
+def build_from_scratch() -> None:
+    """The agent and executor built fresh, prompt values formatted in."""
+    agent_prompts = prompts.agent_prompt_templates(base=True)
+    prompt_values = prompts.build_base_prompt_values()
+    agent = agency.InternalThoughtZeroShotAgent.from_llm_and_tools(
+        llm=agency.llm,
+        tools=tool_auth.NO_AUTH_TOOLS,
+        handle_parsing_errors=True,
+        prefix=agent_prompts.prefix.format(**prompt_values),
+        format_instructions=agent_prompts.format_instructions,
+        suffix=agent_prompts.suffix
+    )
+    agency.AgentExecutor(
+        agent=agent, tools=tool_auth.NO_AUTH_TOOLS, max_iterations=50, verbose=True
+    )
+
+
+def build_from_shared() -> None:
+    """An executor around the shared agent, and the run's prompt values."""
+    agency.create_agent_executor(tool_auth.NO_AUTH_TOOLS, callback_handlers=[], base=True)
+    prompts.build_base_prompt_values()
+
+
+def time_setup(setup) -> float:
+    """Mean milliseconds per setup."""
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        setup()
+    return (time.perf_counter() - start) * 1000 / RUNS
+
+
+def main() -> None:
+    build_from_shared()  # first build, cached afterwards
+
+    scratch = time_setup(build_from_scratch)
+    shared = time_setup(build_from_shared)
+
+    print(f"{'setup':>8} {'ms per message':>15}")
+    print(f"{'scratch':>8} {scratch:>15.3f}")
+    print(f"{'shared':>8} {shared:>15.3f}")
+    print(f"\n{scratch / shared:.1f}x faster with the shared agent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark grocery classification on long lists. Compares finding each item's
+category in the per-setup item index with searching every category of the
+mapping, then times classifying the whole list and reports the inflection caches'
+hit rates.
+"""
+import random
+import time
+
+import mypytoolkit as kit
+
+from jeeves.applets.groceries import classification, utils
+
+
+LIST_LENGTHS = (50, 500, 5000)
+SETUP = "whole foods"
+
+
+def random_list(length: int, rng: random.Random) -> list[str]:
+    """Grocery list lines with quantities, a mix of known and unknown items."""
+    vocabulary = [item for items in utils.RAW_MAPPING.values() for item in items]
+    vocabulary += ["paper towels", "birthday candles", "chicken (good kind)"]
+
+    return [
+        f"{rng.randint(1, 12)} {utils.pluralize(rng.choice(vocabulary))}"
+        for _ in range(length)
+    ]
+
+
+def linear_lookup(check_item: str, setup: str) -> str:
+    """Category by searching each category, reordering the mapping on every access."""
+    for category in kit.reorder_dict(utils.SETUPS[setup.title()], utils.RAW_MAPPING):
+        mapping = kit.reorder_dict(utils.SETUPS[setup.title()], utils.RAW_MAPPING)
+        if check_item in mapping[category]:
+            return category
+
+    return ""
+
+
+def index_lookup(check_item: str, setup: str) -> str:
+    """Category from the setup's item index."""
+    if entry := utils.ITEM_INDEX(setup).get(check_item):
+        return entry[0]
+
+    return ""
+
+
+def time_lookups(lookup, check_items: list[str]) -> float:
+    """Milliseconds taken to find the category of every item."""
+    start = time.perf_counter()
+    for check_item in check_items:
+        lookup(check_item, SETUP)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    rng = random.Random(0)
+
+    print(f"{'items':>6} {'linear ms':>10} {'index ms':>10} {'full list ms':>13}")
+    for length in LIST_LENGTHS:
+        lines = random_list(length, rng)
+        check_items = [
+            classification._check_item_format(line.split(" ", 1)[1]) for line in lines
+        ]
+
+        linear = time_lookups(linear_lookup, check_items)
+        indexed = time_lookups(index_lookup, check_items)
+
+        start = time.perf_counter()
+        classification.classify_grocery_list("\n".join(lines), setup=SETUP)
+        full = (time.perf_counter() - start) * 1000
+
+        print(f"{length:>6} {linear:>10.2f} {indexed:>10.2f} {full:>13.2f}")
+
+    print("\nInflection caches")
+    for name, stats in utils.inflection_stats().items():
+        print(
+            f"{name:>9}: {stats['hit_rate']:.1%} hit rate, "
+            f"{stats['hits']} hits, {stats['misses']} misses, {stats['size']} words"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark web page text extraction. Compares the original BeautifulSoup extraction
+with the streaming engines on the saved pages in `fixtures/html`, with and without
+the page token budget, and reports how much text each keeps. Pages in the fetch
+cache are included too, if there are any.
+"""
+import glob
+import os
+import statistics
+import time
+
+from jeeves.agency import tokenizer
+from jeeves.agency.html_text import ENGINES, get_extractor
+from jeeves.agency.web_fetch import FETCH_CACHE
+from config import CONFIG
+
+
+RUNS = 10
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fixtures", "html")
+
+
+def load_pages() -> dict[str, bytes]:
+    """Saved fixture pages, and pages in the fetch cache, by name."""
+    paths = sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+    paths += sorted(glob.glob(os.path.join(FETCH_CACHE.directory, "*.body")))
+
+    pages = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)[:20]] = f.read()
+    return pages
+
+
+def time_extract(extractor, content: bytes) -> tuple[float, str]:
+    """Median milliseconds to extract a page, and the text."""
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        text = extractor(content)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), text
+
+
+def main() -> None:
+    pages = load_pages()
+    budget = CONFIG.Retrieval.page_max_tokens
+    extractors = {"soup": get_extractor("soup")}
+    for engine in ENGINES:
+        if engine == "soup":
+            continue
+
+        if not isinstance(get_extractor(engine), ENGINES[engine]):
+            print(f"{engine} isn't installed, skipping it.\n")
+            continue
+
+        extractors[engine] = get_extractor(engine)
+        extractors[f"{engine} {budget}"] = get_extractor(engine, budget)
+
+    print(f"{'page':>20} {'KB':>6} {'engine':>14} {'ms':>8} {'tokens':>8} {'speedup':>8}")
+    for name, content in pages.items():
+        baseline = None
+        for label, extractor in extractors.items():
+            ms, text = time_extract(extractor, content)
+            baseline = baseline or ms
+            print(
+                f"{name:>20} {len(content) // 1024:>6} {label:>14} {ms:>8.2f} "
+                f"{tokenizer.count_tokens(text):>8} {baseline / ms:>7.1f}x"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
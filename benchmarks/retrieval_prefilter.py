@@ -0,0 +1,90 @@
+"""
+Benchmark the BM25 pre-filter on long transcripts. For each transcript length,
+compares indexing every chunk with indexing only the pre-filter's candidates:
+chunks and tokens embedded, embedding cost, time to a searchable index, and whether
+the chunk answering the question is still retrieved. Embeds with the OpenAI
+embeddings directly, bypassing the embedding cache, so every run pays full price.
+"""
+import random
+import time
+
+from langchain.vectorstores import FAISS
+
+from jeeves.agency import tokenizer
+from jeeves.agency.bm25 import BM25Index
+from jeeves.agency.retrieval import BaseAnswerer, N_DOCS, openai_embeddings, splitter
+
+
+# Transcript lengths in minutes, at about 150 spoken words a minute
+DURATIONS = (30, 60, 180)
+WORDS_PER_MINUTE = 150
+
+# Dollars per thousand tokens embedded with text-embedding-ada-002
+PRICE_PER_1K_TOKENS = 0.0001
+
+FACT = (
+    "So the Aurora launch got pushed back, the new date is the fourteenth of March, "
+    "mostly because the battery supplier in Osaka missed their shipment."
+)
+QUERY = "Why was the Aurora launch delayed and what's the new date?"
+
+FILLER = (
+    "so yeah I think that's right and you know we were talking about this last time "
+    "and it kind of comes back to the same point which is that people really want "
+    "something simple they can use every day without thinking about it too much and "
+    "honestly that's harder to build than it sounds because there are a lot of "
+    "moving parts and every team has their own idea of what simple means"
+).split()
+
+
+def transcript(minutes: int, rng: random.Random) -> str:
+    """A rambling transcript with the fact somewhere in the middle."""
+    words = [rng.choice(FILLER) for _ in range(minutes * WORDS_PER_MINUTE)]
+    middle = rng.randint(len(words) // 4, 3 * len(words) // 4)
+    return " ".join(words[:middle] + FACT.split() + words[middle:])
+
+
+def build(texts: list[str]) -> tuple[FAISS, float]:
+    """An index of the texts, and the seconds it took."""
+    start = time.perf_counter()
+    index = FAISS.from_texts(texts, openai_embeddings)
+    return index, time.perf_counter() - start
+
+
+def retrieves_fact(index: FAISS) -> bool:
+    """Whether the fact's chunk is among the documents the answerer would use."""
+    return any("Osaka" in doc.page_content for doc in index.similarity_search(QUERY, k=N_DOCS))
+
+
+def main() -> None:
+    rng = random.Random(0)
+    candidates = BaseAnswerer.prefilter_candidates
+
+    print(
+        f"{'minutes':>8} {'mode':>10} {'chunks':>7} {'tokens':>8} {'cost $':>9} "
+        f"{'seconds':>8} {'found':>6}"
+    )
+    for minutes in DURATIONS:
+        chunks = [doc.page_content for doc in splitter.create_documents([transcript(minutes, rng)])]
+
+        start = time.perf_counter()
+        top = BM25Index(chunks).top(QUERY, candidates)
+        prefilter_seconds = time.perf_counter() - start
+        prefiltered = [chunks[i] for i in sorted(top)] if top else chunks
+
+        for mode, texts in (("full", chunks), ("prefilter", prefiltered)):
+            index, seconds = build(texts)
+            if mode == "prefilter":
+                seconds += prefilter_seconds
+
+            tokens = sum(tokenizer.count_tokens_batch(texts))
+            print(
+                f"{minutes:>8} {mode:>10} {len(texts):>7} {tokens:>8} "
+                f"{tokens / 1000 * PRICE_PER_1K_TOKENS:>9.5f} {seconds:>8.2f} "
+                f"{str(retrieves_fact(index)):>6}"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
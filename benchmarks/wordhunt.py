@@ -0,0 +1,166 @@
+"""
+Benchmark WordHunt solve times across board sizes, the pure Python and compiled
+backends, and the cost of expanding a cell's neighbours with coordinate lists
+versus the precomputed bitmask table.
+"""
+import gc
+import os
+import random
+import statistics
+import string
+import time
+import timeit
+
+from jeeves.applets.wordhunt import pure_wordhunt as wordhunt
+
+
+BOARD_SIZES = (4, 5, 6, 8, 12, 16)
+BOARDS_PER_SIZE = 5
+
+
+def random_letters(size: int, rng: random.Random) -> str:
+    """Random board letters, weighted towards vowels like a real WordHunt board."""
+    alphabet = string.ascii_lowercase + "aeiou" * 2
+    return "".join(rng.choices(alphabet, k=size * size))
+
+
+def time_solve(letters: str, size: int, parallel: bool) -> tuple[float, int]:
+    """Seconds taken to solve a board, and the number of words found."""
+    board = wordhunt.Board.from_letters(letters, size, size)
+    start = time.perf_counter()
+    results = board.solve(parallel=parallel)
+    return time.perf_counter() - start, len(results)
+
+
+def backend_benchmark(rng: random.Random) -> None:
+    """Compare serial solve times of the pure Python and compiled backends."""
+    try:
+        from jeeves.applets.wordhunt import cy_wordhunt
+    except ImportError:
+        print("\nCompiled backend isn't built, skipping backend comparison.")
+        return
+
+    print("\nBackends, serial solves")
+    print(f"{'size':>6} {'python ms':>10} {'compiled ms':>12} {'speedup':>8}")
+    for size in BOARD_SIZES:
+        pure_timings, compiled_timings = [], []
+        for _ in range(BOARDS_PER_SIZE):
+            letters = random_letters(size, rng)
+            for backend, timings in (
+                (wordhunt, pure_timings),
+                (cy_wordhunt, compiled_timings),
+            ):
+                board = backend.Board.from_letters(letters, size, size)
+                start = time.perf_counter()
+                board.solve(parallel=False)
+                timings.append((time.perf_counter() - start) * 1000)
+
+        pure, compiled = statistics.median(pure_timings), statistics.median(compiled_timings)
+        print(
+            f"{f'{size}x{size}':>6} {pure:>10.2f} {compiled:>12.2f} "
+            f"{pure / compiled:>7.1f}x"
+        )
+
+
+def list_expansion(board: wordhunt.Board, path: list[tuple[int, int]]) -> list:
+    """One step of the coordinate list search, for every cell on the board."""
+    expanded = []
+    for y in range(board.height):
+        for x in range(board.width):
+            neighbours = wordhunt._circle_around((x, y), board)
+            for neighbour in neighbours:
+                if neighbour in path:
+                    continue
+                board.query(*neighbour)
+            expanded.append(neighbours)
+
+    return expanded
+
+
+def table_expansion(board: wordhunt.Board, visited: int) -> list:
+    """One step of the bitmask search, for every cell on the board."""
+    expanded = []
+    for cell in range(board.width * board.height):
+        neighbours = board.neighbours[cell]
+        for neighbour, bit in neighbours:
+            if visited & bit:
+                continue
+            board.letters[neighbour]
+        expanded.append(neighbours)
+
+    return expanded
+
+
+def allocated_objects(expand, *args) -> int:
+    """
+    Lists and tuples created by an expansion and still alive afterwards. Each
+    cell's neighbours are kept in the result so they can be counted.
+    """
+    gc.disable()
+    try:
+        before = {id(obj) for obj in gc.get_objects()}
+        expanded = expand(*args)
+        allocated = sum(id(obj) not in before for obj in gc.get_objects())
+    finally:
+        gc.enable()
+
+    del expanded
+    # Minus the set of ids, the list of objects and the list holding the results
+    return allocated - 3
+
+
+def neighbour_micro_benchmark(rng: random.Random, size: int = 4) -> None:
+    """Compare neighbour expansion with a realistic 5 cell path already visited."""
+    board = wordhunt.Board.from_letters(random_letters(size, rng), size, size)
+    path = [(0, 0), (1, 0), (1, 1), (2, 1), (2, 2)]
+    visited = sum(1 << (y * size + x) for x, y in path)
+    number = 2000
+
+    print(f"\nNeighbour expansion, every cell of a {size}x{size} board")
+    print(f"{'method':>8} {'us':>8} {'objects':>8}")
+    for name, expand, state in (
+        ("lists", list_expansion, path),
+        ("bitmask", table_expansion, visited),
+    ):
+        seconds = timeit.timeit(lambda: expand(board, state), number=number)
+        print(
+            f"{name:>8} {seconds / number * 1e6:>8.1f} "
+            f"{allocated_objects(expand, board, state):>8}"
+        )
+
+
+def main() -> None:
+    rng = random.Random(0)
+
+    start = time.perf_counter()
+    wordhunt.load_trie()
+    print(f"Dictionary load: {time.perf_counter() - start:.3f}s")
+
+    # Start the pool outside the timings
+    wordhunt._process_pool().submit(int).result()
+    print(f"Parallel workers: {os.cpu_count()}\n")
+
+    print(
+        f"{'size':>6} {'median ms':>10} {'max ms':>10} {'parallel ms':>12} {'words':>8}"
+    )
+    for size in BOARD_SIZES:
+        timings, parallel_timings, counts = [], [], []
+        for _ in range(BOARDS_PER_SIZE):
+            letters = random_letters(size, rng)
+            seconds, count = time_solve(letters, size, parallel=False)
+            timings.append(seconds * 1000)
+            counts.append(count)
+            parallel_timings.append(time_solve(letters, size, parallel=True)[0] * 1000)
+
+        print(
+            f"{f'{size}x{size}':>6} {statistics.median(timings):>10.2f} "
+            f"{max(timings):>10.2f} {statistics.median(parallel_timings):>12.2f} "
+            f"{statistics.median(counts):>8.0f}"
+        )
+
+    backend_benchmark(rng)
+    neighbour_micro_benchmark(rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -78,6 +78,16 @@ class GroceriesConfig(BaseModel):
     full_dt_format: str
 
 
+class WordHuntConfig(BaseModel):
+    """
+    WordHunt configuration, affects the board solver.
+
+    Attributes:
+        compiled_backend (bool): Use the Cython solver if it's been built.
+    """
+    compiled_backend: bool
+
+
 class CocktailsConfig(BaseModel):
     """
     Cocktails configuration, affects the cocktails API.
@@ -94,10 +104,12 @@ class GPTConfig(BaseModel):
 
     Attributes:
         console_agent (bool): Whether to log to the console.
+        hot_reload_prompts (bool): Re-read agent prompt files when they change.
     """
     base_openai_model: str
     temperature: int | float
     console_agent: bool
+    hot_reload_prompts: bool
 
     @field_validator("base_openai_model")
     def validate_base_openai_model(cls, v):
@@ -118,6 +130,90 @@ class GPTConfig(BaseModel):
         return v
 
 
+class ChatHistoryConfig(BaseModel):
+    """
+    Chat history configuration, affects loading agents' chat history.
+
+    Attributes:
+        cache (bool): Keep users' recent history in memory between messages.
+        cache_ttl (int | float): Seconds a cached history is used before reloading.
+        cache_size (int): Most users' histories kept in memory.
+        summarize (bool): Fold older messages into a rolling summary for prompts.
+        recent_turns (int): Latest messages kept word for word alongside the summary.
+    """
+    cache: bool
+    cache_ttl: int | float
+    cache_size: int
+    summarize: bool
+    recent_turns: int
+
+    @field_validator("cache_ttl", "cache_size", "recent_turns")
+    def validate_positive(cls, v):
+        if v <= 0:
+            raise ValueError(
+                "Chat history cache TTL, cache size and recent turns must be positive."
+            )
+
+        return v
+
+
+class RetrievalConfig(BaseModel):
+    """
+    Retrieval configuration, affects the website and YouTube answerers.
+
+    Attributes:
+        index_refresh (int | float): Seconds a saved index is used before its source
+            is checked for changes.
+        index_max_age (int | float): Seconds an unused saved index is kept.
+        index_max_mb (int | float): Most megabytes of saved indexes kept.
+        fetch_timeout (int | float): Seconds before a web page request is abandoned.
+        fetch_ttl (int | float): Seconds a web page without caching headers is used
+            before it's revalidated.
+        fetch_max_ttl (int | float): Most seconds any web page is used before it's
+            revalidated.
+        fetch_cache_mb (int | float): Most megabytes of web pages kept.
+        html_engine (str): Web page text extraction engine, `lxml`, `stream` or `soup`.
+        page_max_tokens (int): Most tokens of a web page's text read and indexed.
+        lexical_prefilter (bool): Let answerers that support it embed only the
+            chunks BM25 ranks best for each question, instead of a saved full index.
+    """
+    index_refresh: int | float
+    index_max_age: int | float
+    index_max_mb: int | float
+    fetch_timeout: int | float
+    fetch_ttl: int | float
+    fetch_max_ttl: int | float
+    fetch_cache_mb: int | float
+    html_engine: str
+    page_max_tokens: int
+    lexical_prefilter: bool
+
+    @field_validator(
+        "index_refresh",
+        "index_max_age",
+        "index_max_mb",
+        "fetch_timeout",
+        "fetch_ttl",
+        "fetch_max_ttl",
+        "fetch_cache_mb",
+        "page_max_tokens",
+    )
+    def validate_positive(cls, v):
+        if v <= 0:
+            raise ValueError(
+                "Retrieval refresh, age, timeout and size limits must be positive."
+            )
+
+        return v
+
+    @field_validator("html_engine")
+    def validate_html_engine(cls, v):
+        if v not in {"lxml", "stream", "soup"}:
+            raise ValueError("Retrieval HTML engine must be lxml, stream or soup.")
+
+        return v
+
+
 class TelegramConfig(BaseModel):
     """
     Telegram configuration, affects the Telegram API.
@@ -138,13 +234,19 @@ class Config(BaseModel):
         General (GeneralConfig): General configuration.
         Weather (WeatherConfig): Weather configuration.
         Groceries (GroceriesConfig): Groceries configuration.
+        WordHunt (WordHuntConfig): WordHunt configuration.
         Cocktails (CocktailsConfig): Cocktails configuration.
         GPT (GPTConfig): GPT configuration.
+        ChatHistory (ChatHistoryConfig): Chat history configuration.
+        Retrieval (RetrievalConfig): Retrieval configuration.
     """
     General: GeneralConfig
     Security: SecurityConfig
     Weather: WeatherConfig
     Groceries: GroceriesConfig
+    WordHunt: WordHuntConfig
     Cocktails: CocktailsConfig
     GPT: GPTConfig
+    ChatHistory: ChatHistoryConfig
+    Retrieval: RetrievalConfig
     Telegram: TelegramConfig
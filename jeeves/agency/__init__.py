@@ -5,6 +5,8 @@ from langchain.callbacks import get_openai_callback
 from langchain.callbacks.base import BaseCallbackHandler
 from langchain.schema import OutputParserException
 
+from collections import OrderedDict
+import threading
 import uuid
 import pytz
 import datetime as dt
@@ -16,7 +18,9 @@ from jeeves.permissions import User
 from jeeves.agency import tool_auth
 from jeeves.agency.chat_history.models import Message
 from jeeves.agency import logs_callback, prompts
-from jeeves.agency.chat_history import ChatHistory
+from jeeves.agency.prompts.registry import ParsedTemplate
+from jeeves.agency.context import AgentContext
+from jeeves.agency.chat_history.summary import summarize_in_background
 
 
 # ---- Build the agent ----
@@ -43,46 +47,68 @@ llm = ChatOpenAI(
 )
 
 
-def create_agent_executor(
-    toolkit: list[Tool],
-    user: User,
-    callback_handlers: list[BaseCallbackHandler],
-) -> AgentExecutor:
-    """Create the agent given authenticated tools."""
-    agent_prompts: prompts.AgentPrompts = prompts.build_prompts(user)
+# Most agents kept, one per distinct toolset and prompt
+AGENT_CACHE_SIZE = 32
+
+_agents: OrderedDict[tuple, InternalThoughtZeroShotAgent] = OrderedDict()
+_agents_lock = threading.Lock()
+
+
+def get_agent(
+    toolkit: list[Tool], agent_prompts: prompts.AgentPrompts
+) -> InternalThoughtZeroShotAgent:
+    """
+    The agent for a toolset, built once per toolset signature (tool names and
+    descriptions, all the agent's prompt uses) and prompt templates, and shared by
+    every run. Per-run fields are left as prompt variables, given when the agent
+    runs. Tools and callbacks are per run too, and belong to the executor.
+    """
+    key = (
+        agent_prompts.prefix,
+        agent_prompts.format_instructions,
+        agent_prompts.suffix,
+        tuple((tool.name, tool.description) for tool in toolkit),
+    )
+
+    with _agents_lock:
+        if (agent := _agents.get(key)) is not None:
+            _agents.move_to_end(key)
+            return agent
+
+    input_variables = (
+        ParsedTemplate(agent_prompts.prefix).variables
+        | ParsedTemplate(agent_prompts.suffix).variables
+    )
     agent = InternalThoughtZeroShotAgent.from_llm_and_tools(
         llm=llm,
         tools=toolkit,
         handle_parsing_errors=True,
         prefix=agent_prompts.prefix,
         format_instructions=agent_prompts.format_instructions,
-        suffix=agent_prompts.suffix
-    )
-    return AgentExecutor(
-        agent=agent,
-        tools=toolkit,
-        max_iterations=50,
-        verbose=True,
-        callbacks=callback_handlers
+        suffix=agent_prompts.suffix,
+        input_variables=sorted(input_variables)
     )
 
+    with _agents_lock:
+        _agents[key] = agent
+        if len(_agents) > AGENT_CACHE_SIZE:
+            _agents.popitem(last=False)
+
+    return agent
+
 
-def create_base_agent_executor(
+def create_agent_executor(
     toolkit: list[Tool],
     callback_handlers: list[BaseCallbackHandler],
+    base: bool = False,
 ) -> AgentExecutor:
-    """Create the agent executor without a User object."""
-    agent_prompts: prompts.AgentPrompts = prompts.build_base_agent_prompts()
-    agent = InternalThoughtZeroShotAgent.from_llm_and_tools(
-        llm=llm,
-        tools=toolkit,
-        handle_parsing_errors=True,
-        prefix=agent_prompts.prefix,
-        format_instructions=agent_prompts.format_instructions,
-        suffix=agent_prompts.suffix
-    )
+    """
+    Create the executor for a run given authenticated tools, reusing the agent for
+    its toolset. Run it with the run's prompt values, see `run_agent`. `base` is
+    for an agent without a User.
+    """
     return AgentExecutor(
-        agent=agent,
+        agent=get_agent(toolkit, prompts.agent_prompt_templates(base=base)),
         tools=toolkit,
         max_iterations=50,
         verbose=True,
@@ -112,10 +138,12 @@ def retry_couldnt_parse(function):
 
 
 @retry_couldnt_parse
-def run_agent(agent_executor: AgentExecutor, query: str, uid: str) -> str:
-    """Run the agent."""
+def run_agent(
+    agent_executor: AgentExecutor, query: str, uid: str, prompt_values: dict[str, str]
+) -> str:
+    """Run the agent, filling its prompt's per-run fields with `prompt_values`."""
     with get_openai_callback() as cb:
-        res = agent_executor.run(query)
+        res = agent_executor.run(input=query, **prompt_values)
         logs_callback.logger.info(
             f"{uid}: UsageInfo: "
             f"Total Tokens: {cb.total_tokens}, "
@@ -136,19 +164,20 @@ def generate_agent_response(content: str, user: User, uid: str = "") -> str:
     uid = uid or _create_uid()
     assert user
 
-    # Build chat history and toolkit using inbound phone
-    ChatHistory.from_inbound_phone(user.phone)
+    # Load chat history once for the whole run, and build the toolkit
+    context = AgentContext.from_user(user, uid)
     callback_handlers = logs_callback.create_callback_handlers(uid)
     toolkit = tool_auth.build_tools(user, callback_handlers)
 
     # Run
-    agent_executor = create_agent_executor(
-        toolkit, user, callback_handlers
+    agent_executor = create_agent_executor(toolkit, callback_handlers)
+    prompt_values = prompts.build_prompt_values(
+        context.user, chat_history=context.chat_history, summary=context.summary
     )
-    response: str = run_agent(agent_executor, content, uid)
+    response: str = run_agent(agent_executor, content, uid, prompt_values)
 
-    # Save message to chats database
-    ChatHistory.from_inbound_phone(user.phone).add_message(
+    # Save message to chats database, insert only
+    context.chat_history.add_message(
         Message(
             datetime=dt.datetime.now(pytz.timezone(CONFIG.General.default_timezone)),
             inbound_phone=user.phone,
@@ -157,6 +186,10 @@ def generate_agent_response(content: str, user: User, uid: str = "") -> str:
         )
     )
 
+    # Fold older messages into the user's summary, after responding
+    if CONFIG.ChatHistory.summarize:
+        summarize_in_background(user.phone)
+
     return response.strip()
 
 
@@ -174,7 +207,9 @@ def generate_base_agent_response(content: str, uid: str = "") -> str:
         tool.callbacks = callback_handlers
 
     # Run
-    agent_executor = create_base_agent_executor(toolkit, callback_handlers)
-    response: str = run_agent(agent_executor, content, uid)
+    agent_executor = create_agent_executor(toolkit, callback_handlers, base=True)
+    response: str = run_agent(
+        agent_executor, content, uid, prompts.build_base_prompt_values()
+    )
 
     return response.strip()
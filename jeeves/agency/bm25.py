@@ -0,0 +1,77 @@
+"""
+In-process BM25 ranking of text chunks. Used as a lexical pre-filter so long
+sources only embed the chunks that share words with the query.
+"""
+from collections import Counter
+import math
+import re
+
+
+# Words too common to say anything about a chunk
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for",
+    "from", "has", "have", "how", "i", "in", "is", "it", "of", "on", "or", "so",
+    "that", "the", "this", "to", "was", "were", "what", "when", "where", "which",
+    "who", "why", "with", "you",
+}
+
+_WORD = re.compile(r"\w+")
+
+
+def terms(text: str) -> list[str]:
+    """Casefolded words of a text, in any script, without stopwords."""
+    return [word for word in _WORD.findall(text.casefold()) if word not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a list of texts.
+
+    Attributes:
+        k1 (float): Term frequency saturation.
+        b (float): Length normalization.
+    """
+    def __init__(self, texts: list[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.frequencies: list[Counter[str]] = [Counter(terms(text)) for text in texts]
+        self.lengths = [sum(frequency.values()) for frequency in self.frequencies]
+        self.average_length = sum(self.lengths) / len(texts) if texts else 0
+
+        document_frequencies: Counter[str] = Counter()
+        for frequency in self.frequencies:
+            document_frequencies.update(frequency.keys())
+
+        self.idf = {
+            term: math.log(1 + (len(texts) - count + 0.5) / (count + 0.5))
+            for term, count in document_frequencies.items()
+        }
+
+    def scores(self, query: str) -> list[float]:
+        """Score of each text against the query."""
+        query_terms = [term for term in set(terms(query)) if term in self.idf]
+        scores = []
+
+        for frequency, length in zip(self.frequencies, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+            scores.append(
+                sum(
+                    self.idf[term] * frequency[term] * (self.k1 + 1) / (frequency[term] + norm)
+                    for term in query_terms
+                    if term in frequency
+                )
+            )
+
+        return scores
+
+    def top(self, query: str, k: int) -> list[int]:
+        """
+        Indices of the `k` best matching texts, best first, ties in their original
+        order. Empty if no text shares a term with the query, as ranking them would
+        only keep the first `k`.
+        """
+        scores = self.scores(query)
+        if not any(scores):
+            return []
+
+        return sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:k]
@@ -0,0 +1,125 @@
+"""
+In-process cache of users' recent chat history. Active users send bursts of
+messages, so their history is kept between agent runs instead of being read from
+the database for each one.
+
+Entries are checked against a per-user version number stored in the database,
+bumped on every saved message, so a message saved by another worker invalidates
+this worker's copy.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+
+from jeeves.agency.chat_history.models import Message
+
+
+@dataclass
+class CachedHistory:
+    """
+    A user's cached messages.
+
+    Attributes:
+        messages (list[Message]): Newest messages, oldest first.
+        version (int): The user's history version the messages are current as of.
+        loaded_at (float): Monotonic time the messages were loaded from the database.
+    """
+    messages: list[Message]
+    version: int
+    loaded_at: float
+
+
+class HistoryCache:
+    """
+    Least recently used cache of chat history by phone, with a time to live and hit
+    and miss counts. Locked as it's shared by request threads.
+
+    Attributes:
+        maxsize (int): Most users kept before the least recently used is dropped.
+        ttl (float): Seconds an entry is used before it's reloaded regardless.
+        window (int): Most messages kept per user, newest first.
+        hits (int): Loads answered from the cache.
+        misses (int): Loads that went to the database.
+        stale (int): Misses caused by an expired or out of date entry.
+    """
+    def __init__(self, maxsize: int, ttl: float, window: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.window = window
+        self.entries: OrderedDict[str, CachedHistory] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.lock = threading.Lock()
+
+    def get(self, phone: str, version: int) -> list[Message] | None:
+        """
+        The user's cached messages if they're current as of `version`, otherwise
+        None. A new list, so callers adding to it don't change what's cached.
+        Messages themselves aren't changed after they're created, so they're shared.
+        """
+        with self.lock:
+            entry = self.entries.get(phone)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expired = time.monotonic() - entry.loaded_at >= self.ttl
+            if entry.version != version or expired:
+                del self.entries[phone]
+                self.misses += 1
+                self.stale += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(phone)
+            return list(entry.messages)
+
+    def put(self, phone: str, messages: list[Message], version: int) -> None:
+        """Cache messages loaded from the database as of `version`."""
+        with self.lock:
+            self.entries[phone] = CachedHistory(
+                messages=messages[-self.window:],
+                version=version,
+                loaded_at=time.monotonic(),
+            )
+            self.entries.move_to_end(phone)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def add_message(self, phone: str, message: Message, version: int) -> None:
+        """
+        Write a saved message through to the user's entry. `version` is the user's
+        version after saving it. If that skipped a version, another worker saved a
+        message this entry doesn't have, so the entry is dropped instead.
+        """
+        with self.lock:
+            entry = self.entries.get(phone)
+            if entry is None:
+                return
+
+            if entry.version != version - 1:
+                del self.entries[phone]
+                return
+
+            entry.messages.append(message)
+            del entry.messages[:-self.window]
+            entry.version = version
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Hits, misses, stale misses, hit rate and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+        }
@@ -1,16 +1,109 @@
 """Interact with a chats Deta Base to facilitate chat history."""
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne, ReturnDocument, ASCENDING, DESCENDING
 
 import datetime as dt
 
 from keys import KEYS
-from jeeves.agency.chat_history.models import Message
-from jeeves.agency.chat_history.filter import BaseFilterer
+from config import CONFIG
+from jeeves.agency.chat_history.models import Message, Summary
+from jeeves.agency.chat_history.cache import HistoryCache
+from jeeves.agency.chat_history.filter import BaseFilterer, count_message_tokens
 
 
 # Initialize the chats Deta Base
 CHATS_COLL = MongoClient(KEYS.MongoDB.connect_str)["Jeeves"]["chats"]
 
+# Per-user history versions, bumped on every saved message to invalidate caches
+VERSIONS_COLL = MongoClient(KEYS.MongoDB.connect_str)["Jeeves"]["chat_versions"]
+
+# Newest messages loaded for an agent run, more than the prompt's token budget fits
+RECENT_MESSAGES_LIMIT = 100
+
+# Only the fields a Message is built from, and the id to backfill token counts
+MESSAGE_PROJECTION = {
+    "datetime": 1,
+    "inbound_phone": 1,
+    "user_input": 1,
+    "agent_response": 1,
+    "token_count": 1,
+}
+
+# Users' recent history kept between agent runs, see `ChatHistory.recent`
+HISTORY_CACHE = HistoryCache(
+    maxsize=CONFIG.ChatHistory.cache_size,
+    ttl=CONFIG.ChatHistory.cache_ttl,
+    window=RECENT_MESSAGES_LIMIT
+)
+
+
+def ensure_indexes() -> None:
+    """
+    Create the index windowed history queries use, a user's messages newest first.
+    Idempotent, run at startup.
+    """
+    CHATS_COLL.create_index([("inbound_phone", ASCENDING), ("datetime", DESCENDING)])
+
+
+def _history_version(inbound_phone: str) -> int:
+    """A user's current history version, 0 if they've never saved a message."""
+    version = VERSIONS_COLL.find_one({"_id": inbound_phone})
+    return version["version"] if version else 0
+
+
+def _bump_history_version(inbound_phone: str) -> int:
+    """Increment a user's history version after saving a message. Returns the new one."""
+    return VERSIONS_COLL.find_one_and_update(
+        {"_id": inbound_phone},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )["version"]
+
+
+def _validate_phone(inbound_phone: str) -> str:
+    """Strip a leading + and check the number is 11 digits, E.164 format."""
+    if inbound_phone.startswith("+"):
+        inbound_phone = inbound_phone[1:]
+
+    assert inbound_phone.isnumeric(), "Inbound phone number must be numeric."
+    assert (
+        len(inbound_phone) == 11
+    ), "Inbound phone number must be 11 digits, E.164 format."
+
+    return inbound_phone
+
+
+def _parse_message(document: dict) -> Message:
+    """Build a Message from a database document."""
+    return Message(
+        datetime=dt.datetime.fromisoformat(document["datetime"]),
+        user_input=document["user_input"],
+        agent_response=document["agent_response"],
+        inbound_phone=document["inbound_phone"],
+        token_count=document.get("token_count"),
+    )
+
+
+def _backfill_token_counts(documents: list[dict]) -> None:
+    """
+    Count and store tokens for documents saved before messages carried a token
+    count, so each is only counted once. Sets the count on the documents too.
+    """
+    updates = []
+    for document in documents:
+        if document.get("token_count") is not None:
+            continue
+
+        document["token_count"] = count_message_tokens(_parse_message(document))
+        updates.append(
+            UpdateOne(
+                {"_id": document["_id"]}, {"$set": {"token_count": document["token_count"]}}
+            )
+        )
+
+    if updates:
+        CHATS_COLL.bulk_write(updates, ordered=False)
+
 
 class ChatHistory:
     """
@@ -30,65 +123,118 @@ class ChatHistory:
         """
         return filterer.filter_messages(self.messages)
 
-    def format_messages(self, filterer: BaseFilterer | None = None) -> str:
+    def format_messages(
+        self, filterer: BaseFilterer | None = None, summary: Summary | None = None
+    ) -> str:
         """
         Format messages into a string. Returns a string. Providing a Filterer
         is optional, but will filter the messages first before formatting.
+
+        With a `summary`, only messages newer than it are formatted, after the
+        summary itself.
         """
         messages = self.messages
 
+        if summary is not None:
+            messages = [message for message in messages if message.datetime > summary.through]
+
         if filterer is not None:
-            messages = self.filter_messages(filterer)
+            messages = filterer.filter_messages(messages)
 
-        # Remove curly braces (confuses prompt template)
-        for message in messages:
-            message.user_input = message.user_input.replace("{", "((").replace(
-                "}", "))"
-            )
-            message.agent_response = message.agent_response.replace("{", "((").replace(
-                "}", "))"
-            )
+        # Transcripts are escaped for the prompt template when messages are created
+        formatted = "\n".join([message.transcript for message in messages])
 
-        message_strings: list[str] = [
-            f"Me: {message.user_input}\nJeeves: {message.agent_response}"
-            for message in messages
-        ]
+        if summary is None:
+            return formatted
 
-        return "\n".join(message_strings)
+        return (
+            f"Summary of our earlier conversation: {summary.transcript}\n\n"
+            f"Our latest messages:\n{formatted}"
+        )
 
     @classmethod
-    def from_inbound_phone(cls, inbound_phone: str) -> "ChatHistory":
+    def from_inbound_phone(
+        cls,
+        inbound_phone: str,
+        limit: int | None = None,
+        after: dt.datetime | None = None,
+        oldest: bool = False
+    ) -> "ChatHistory":
         """
-        Retrieve chat history from the database.
+        Retrieve chat history from the database, oldest first. Provide `limit` to
+        only load the newest `limit` messages, or the oldest with `oldest`, and
+        `after` to only load messages sent after that datetime. Both are applied by
+        the database, using the index from `ensure_indexes`.
+
+        Datetimes are compared as isoformat strings, which sort chronologically as
+        they're all stored in the default timezone.
         """
-        # Validate the inbound phone number
-        if inbound_phone.startswith("+"):
-            inbound_phone = inbound_phone[1:]
+        inbound_phone = _validate_phone(inbound_phone)
+
+        query = {"inbound_phone": inbound_phone}
+        if after is not None:
+            query["datetime"] = {"$gt": after.isoformat()}
+
+        # Newest first so the limit keeps the most recent, flipped back below
+        user_messages = CHATS_COLL.find(query, MESSAGE_PROJECTION).sort(
+            "datetime", ASCENDING if oldest else DESCENDING
+        )
+        if limit is not None:
+            user_messages = user_messages.limit(limit)
 
-        assert inbound_phone.isnumeric(), "Inbound phone number must be numeric."
-        assert (
-            len(inbound_phone) == 11
-        ), "Inbound phone number must be 11 digits, E.164 format."
+        documents = list(user_messages)
+        _backfill_token_counts(documents)
 
-        user_messages = CHATS_COLL.find({"inbound_phone": inbound_phone})
+        if oldest:
+            return cls(messages=[_parse_message(document) for document in documents])
 
         # Parse the messages into a list of Message objects
-        messages = [
-            Message(
-                datetime=dt.datetime.fromisoformat(message["datetime"]),
-                user_input=message["user_input"],
-                agent_response=message["agent_response"],
-                inbound_phone=message["inbound_phone"]
-            )
-            for message in user_messages
-        ]
+        return cls(messages=[_parse_message(document) for document in documents[::-1]])
 
-        return cls(messages=messages)
+    @classmethod
+    def recent(cls, inbound_phone: str) -> "ChatHistory":
+        """
+        The newest `RECENT_MESSAGES_LIMIT` messages, oldest first. Served from
+        `HISTORY_CACHE` when the cache is enabled and the user's entry is current,
+        which costs a single version lookup instead of reading the messages.
+        """
+        if not CONFIG.ChatHistory.cache:
+            return cls.from_inbound_phone(inbound_phone, limit=RECENT_MESSAGES_LIMIT)
+
+        inbound_phone = _validate_phone(inbound_phone)
+
+        # Read before the messages, so a message saved in between makes it stale
+        version = _history_version(inbound_phone)
+        if (messages := HISTORY_CACHE.get(inbound_phone, version)) is not None:
+            return cls(messages=messages)
+
+        chat_history = cls.from_inbound_phone(inbound_phone, limit=RECENT_MESSAGES_LIMIT)
+        HISTORY_CACHE.put(inbound_phone, chat_history.messages, version)
+        return chat_history
 
     def add_message(self, message: Message) -> str:
         """
-        Add a message to the database.
-        Returns a dictionary of the full database entry.
+        Add a message to the database. It never reads the history, so add to a
+        history that's already loaded rather than loading one to add to. Returns a
+        dictionary of the full database entry.
+
+        The message's token count is stored with it, so it's never counted again.
+        With the cache enabled, saving also bumps the user's history version, a
+        second round trip that returns the new version, and the message is written
+        through to `HISTORY_CACHE` at that version.
         """
-        self.messages.append(message)  # add the message to local store, though unused
-        return CHATS_COLL.insert_one(message.to_dict())
+        if message.token_count is None:
+            message = message.model_copy(
+                update={"token_count": count_message_tokens(message)}
+            )
+
+        self.messages.append(message)  # keep the local store in sync with the database
+        result = CHATS_COLL.insert_one(message.to_dict())
+
+        if CONFIG.ChatHistory.cache:
+            inbound_phone = message.inbound_phone.removeprefix("+")
+            HISTORY_CACHE.add_message(
+                inbound_phone, message, _bump_history_version(inbound_phone)
+            )
+
+        return result
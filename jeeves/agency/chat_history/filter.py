@@ -1,15 +1,29 @@
 """Create message filterers."""
-import tiktoken
-
 from abc import ABC, abstractmethod
 import datetime as dt
 
+from jeeves.agency import tokenizer
 from jeeves.agency.chat_history.models import Message
 
 
+# Default token budget of chat history in a prompt
+HISTORY_MAX_TOKENS = 1000
+
+
 def _count_tokens(content: str) -> int:
     """Count the number of tokens in the content."""
-    return len(tiktoken.encoding_for_model("gpt-4").encode(content))
+    return tokenizer.count_tokens(content)
+
+
+def count_message_tokens(message: Message) -> int:
+    """
+    Count tokens roughly by adding all conversational content. Use the message's
+    stored count if it has one.
+    """
+    if message.token_count is not None:
+        return message.token_count
+
+    return _count_tokens(message.user_input + " " + message.agent_response)
 
 
 class BaseFilterer(ABC):
@@ -76,8 +90,11 @@ class TokenCountFilterer(BaseFilterer):
     """
     Filter messages by token count. Return all messages whose collective token
     count is less than `max_tokens`.
+
+    Uses the counts stored on messages when they were saved, so only messages
+    without one are tokenized.
     """
-    def __init__(self, max_tokens: int = 1000) -> None:
+    def __init__(self, max_tokens: int = HISTORY_MAX_TOKENS) -> None:
         """Initialize the filterer."""
         self.max_tokens = int(max_tokens)
 
@@ -97,8 +114,7 @@ class TokenCountFilterer(BaseFilterer):
         return_messages: list[Message] = []
         token_count = 0
         for message in messages[::-1]:
-            # Count tokens roughly by adding all conversational content
-            count = _count_tokens(message.user_input + " " + message.agent_response)
+            count = count_message_tokens(message)
 
             # If the token count is greater than the max, break
             if token_count + count > self.max_tokens:
@@ -1,23 +1,53 @@
 """Models for chat history."""
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 import datetime as dt
 
 
+# Curly braces confuse prompt templates, so they're swapped for parentheses
+PROMPT_ESCAPES = str.maketrans({"{": "((", "}": "))"})
+
+
 class Message(BaseModel):
     """
-    A Message is both the user input and the agent response.
+    A Message is both the user input and the agent response. Its line in a prompt's
+    chat history is rendered once, when it's created, so messages are frozen. Use
+    `model_copy(update=...)` for a changed message, its line is rendered again.
 
     Attributes:
         datetime: The datetime of the message.
         inbound_phone: The inbound phone number.
         user_input: The user input.
         agent_response: The agent response.
+        token_count: Tokens in the user input and agent response, counted once when
+            the message is saved. None for older messages until they're backfilled.
     """
+    model_config = ConfigDict(frozen=True)
+
     datetime: dt.datetime
     inbound_phone: str
     user_input: str
     agent_response: str
+    token_count: int | None = None
+
+    _transcript: str = PrivateAttr(default="")
+
+    def model_post_init(self, __context) -> None:
+        """Render the transcript line, escaped for prompt templates."""
+        self._transcript = (
+            f"Me: {self.user_input}\nJeeves: {self.agent_response}"
+        ).translate(PROMPT_ESCAPES)
+
+    def model_copy(self, *, update: dict | None = None, deep: bool = False) -> "Message":
+        """A copy with `update` applied, its transcript rendered from the new fields."""
+        copy = super().model_copy(update=update, deep=deep)
+        copy.model_post_init(None)
+        return copy
+
+    @property
+    def transcript(self) -> str:
+        """The message as it appears in a prompt's chat history."""
+        return self._transcript
 
     def to_dict(self) -> dict:
         """Return the message as a dictionary."""
@@ -25,5 +55,35 @@ class Message(BaseModel):
             "datetime": self.datetime.isoformat(),
             "inbound_phone": self.inbound_phone,
             "user_input": self.user_input,
-            "agent_response": self.agent_response
+            "agent_response": self.agent_response,
+            "token_count": self.token_count
+        }
+
+
+class Summary(BaseModel):
+    """
+    A rolling summary of a user's older messages, carried by prompts in place of
+    the messages themselves.
+
+    Attributes:
+        inbound_phone: The inbound phone number.
+        content: The summary.
+        through: The datetime of the newest message folded into the summary.
+    """
+    inbound_phone: str
+    content: str
+    through: dt.datetime
+
+    @property
+    def transcript(self) -> str:
+        """The summary as it appears in a prompt's chat history."""
+        return self.content.translate(PROMPT_ESCAPES)
+
+    def to_dict(self) -> dict:
+        """Return the summary as a dictionary, keyed by phone."""
+        return {
+            "_id": self.inbound_phone,
+            "inbound_phone": self.inbound_phone,
+            "content": self.content,
+            "through": self.through.isoformat()
         }
@@ -0,0 +1,193 @@
+"""
+Rolling summaries of users' older messages. After each message, older turns are
+folded into the user's stored summary in the background, so prompts carry a short
+summary and the latest few messages instead of a long history.
+"""
+from langchain.chat_models import ChatOpenAI
+from pymongo import MongoClient, DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+import datetime as dt
+import threading
+
+from keys import KEYS
+from config import CONFIG
+from jeeves.agency.logs_callback import logger
+from jeeves.agency.chat_history.database import (
+    ChatHistory, CHATS_COLL, RECENT_MESSAGES_LIMIT
+)
+from jeeves.agency.chat_history.filter import count_message_tokens
+from jeeves.agency.chat_history.models import Message, Summary
+
+
+SUMMARIES_COLL = MongoClient(KEYS.MongoDB.connect_str)["Jeeves"]["chat_summaries"]
+
+# Most tokens of messages folded into a summary at once
+SUMMARY_INPUT_TOKENS = 3000
+
+# Newest messages read for a user's first summary, older ones count as covered
+FIRST_SUMMARY_MESSAGES = RECENT_MESSAGES_LIMIT
+
+llm = ChatOpenAI(
+    model_name=CONFIG.GPT.base_openai_model,
+    openai_api_key=KEYS.OpenAI.api_key,
+    temperature=0,
+    max_tokens=300
+)
+
+SUMMARY_PROMPT = (
+    "You keep a running summary of a conversation between me and my assistant, "
+    "Jeeves. Update the summary with the new messages below. Keep facts, "
+    "preferences, names, plans and open questions Jeeves may need later, and drop "
+    "small talk. Write at most 150 words.\n\n"
+    "Current summary:\n{summary}\n\n"
+    "New messages:\n{messages}\n\n"
+    "Updated summary:"
+)
+
+# Phones with an update running in this process
+_updating: set[str] = set()
+_updating_lock = threading.Lock()
+
+
+def load_summary(inbound_phone: str) -> Summary | None:
+    """A user's summary, or None if they don't have one yet."""
+    summary = SUMMARIES_COLL.find_one({"_id": inbound_phone.removeprefix("+")})
+
+    if summary is None:
+        return None
+
+    return Summary(
+        inbound_phone=summary["inbound_phone"],
+        content=summary["content"],
+        through=dt.datetime.fromisoformat(summary["through"])
+    )
+
+
+def _fold_batch(messages: list[Message]) -> list[Message]:
+    """
+    The oldest messages that fit in `SUMMARY_INPUT_TOKENS`, at least one so a long
+    message is never skipped.
+    """
+    batch: list[Message] = []
+    tokens = 0
+
+    for message in messages:
+        tokens += count_message_tokens(message)
+        if batch and tokens > SUMMARY_INPUT_TOKENS:
+            break
+        batch.append(message)
+
+    return batch
+
+
+def update_summary(inbound_phone: str) -> Summary | None:
+    """
+    Fold the user's unsummarized messages, other than the latest `recent_turns`,
+    into their summary. Waits until twice `recent_turns` messages are unsummarized,
+    so the summary is rewritten every few messages rather than after each one.
+    Returns the user's summary, updated or not.
+
+    Messages are folded oldest first, in batches that fit the summary prompt, until
+    the summary has caught up. `through` is always the newest message the model
+    actually read. A user's first summary only reads their newest
+    `FIRST_SUMMARY_MESSAGES` messages, so a long history isn't replayed through the
+    model, and older messages count as covered.
+
+    Each batch only replaces the summary if it hasn't changed since it was read, so
+    if workers update it at the same time the first one wins.
+    """
+    inbound_phone = inbound_phone.removeprefix("+")
+    recent_turns = CONFIG.ChatHistory.recent_turns
+    summary = load_summary(inbound_phone)
+
+    query = {"inbound_phone": inbound_phone}
+    if summary is not None:
+        query["datetime"] = {"$gt": summary.through.isoformat()}
+    unsummarized = CHATS_COLL.count_documents(query)
+
+    if unsummarized < 2 * recent_turns:
+        return summary
+
+    after = summary.through if summary else None
+    if summary is None and unsummarized > FIRST_SUMMARY_MESSAGES:
+        before_window = next(
+            CHATS_COLL.find(query, {"datetime": 1})
+            .sort("datetime", DESCENDING)
+            .skip(FIRST_SUMMARY_MESSAGES)
+            .limit(1)
+        )
+        after = dt.datetime.fromisoformat(before_window["datetime"])
+        unsummarized = FIRST_SUMMARY_MESSAGES
+
+    while unsummarized > recent_turns:
+        to_fold = _fold_batch(
+            ChatHistory.from_inbound_phone(
+                inbound_phone,
+                limit=min(unsummarized - recent_turns, RECENT_MESSAGES_LIMIT),
+                after=after,
+                oldest=True
+            ).messages
+        )
+        if not to_fold:
+            break
+
+        content = llm.predict(
+            SUMMARY_PROMPT.format(
+                summary=summary.content if summary else "None yet.",
+                messages="\n".join([message.transcript for message in to_fold])
+            )
+        ).strip()
+
+        new_summary = Summary(
+            inbound_phone=inbound_phone,
+            content=content,
+            through=to_fold[-1].datetime
+        )
+
+        if summary is None:
+            try:
+                SUMMARIES_COLL.insert_one(new_summary.to_dict())
+            except DuplicateKeyError:
+                return load_summary(inbound_phone)
+        else:
+            replaced = SUMMARIES_COLL.replace_one(
+                {"_id": inbound_phone, "through": summary.through.isoformat()},
+                new_summary.to_dict()
+            )
+            if not replaced.matched_count:
+                return load_summary(inbound_phone)
+
+        summary = new_summary
+        after = summary.through
+        unsummarized -= len(to_fold)
+
+    return summary
+
+
+def _update_summary_thread(inbound_phone: str) -> None:
+    """Update a summary, logging instead of raising since nobody's waiting on it."""
+    try:
+        update_summary(inbound_phone)
+    except Exception as e:
+        logger.error(f"Summary update failed for {inbound_phone}: {e}")
+    finally:
+        with _updating_lock:
+            _updating.discard(inbound_phone)
+
+
+def summarize_in_background(inbound_phone: str) -> None:
+    """
+    Update the user's summary in a thread, after their message has been answered.
+    Does nothing if an update for them is already running in this process.
+    """
+    inbound_phone = inbound_phone.removeprefix("+")
+
+    with _updating_lock:
+        if inbound_phone in _updating:
+            return
+        _updating.add(inbound_phone)
+
+    threading.Thread(
+        target=_update_summary_thread, args=(inbound_phone,), daemon=True
+    ).start()
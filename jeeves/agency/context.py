@@ -0,0 +1,38 @@
+"""Request-scoped state for a single agent run."""
+from dataclasses import dataclass
+
+from jeeves.permissions import User
+from config import CONFIG
+from jeeves.agency.chat_history import ChatHistory
+from jeeves.agency.chat_history.models import Summary
+from jeeves.agency.chat_history.summary import load_summary
+
+
+@dataclass
+class AgentContext:
+    """
+    What an agent run knows about its user, loaded once at the start of the run and
+    shared by prompt building and persistence, so the database is read only once.
+
+    Attributes:
+        uid (str): Unique ID of the run, used in logs.
+        user (User): The user the agent is responding to.
+        chat_history (ChatHistory): The user's recent chat history as of the start of
+            the run.
+        summary (Summary | None): Summary of the user's older messages, if summaries
+            are enabled and the user has one.
+    """
+    uid: str
+    user: User
+    chat_history: ChatHistory
+    summary: Summary | None = None
+
+    @classmethod
+    def from_user(cls, user: User, uid: str) -> "AgentContext":
+        """Load the user's recent chat history and summary and create the context."""
+        return cls(
+            uid=uid,
+            user=user,
+            chat_history=ChatHistory.recent(user.phone),
+            summary=load_summary(user.phone) if CONFIG.ChatHistory.summarize else None
+        )
@@ -0,0 +1,138 @@
+"""
+Content-addressed cache of text embeddings. Answerers re-split and re-embed the
+same website, transcript or memory for every question, so each chunk's embedding
+is stored in MongoDB by model and a hash of its text, and only chunks the cache
+hasn't seen are sent to the embedding API. Entries unused for `EMBEDDINGS_TTL`
+are expired by MongoDB.
+
+Queries are one-offs that rarely repeat, so they're only kept in a small
+in-process cache rather than stored.
+"""
+from langchain.embeddings.base import Embeddings
+from pymongo import MongoClient
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+from array import array
+from functools import lru_cache
+import datetime as dt
+import hashlib
+import threading
+
+from keys import KEYS
+
+
+EMBEDDINGS_COLL = MongoClient(KEYS.MongoDB.connect_str)["Jeeves"]["embeddings_cache"]
+
+# Seconds an unused embedding is kept
+EMBEDDINGS_TTL = 30 * 24 * 60 * 60
+
+# Used embeddings' last use is only refreshed once this old, to save writes
+LAST_USED_RESOLUTION = dt.timedelta(days=1)
+
+# Most query embeddings kept in memory
+QUERY_CACHE_SIZE = 256
+
+
+def ensure_indexes() -> None:
+    """
+    Create the TTL index expiring unused embeddings, and date entries saved before
+    it so they expire too. Idempotent, run at startup.
+    """
+    EMBEDDINGS_COLL.update_many(
+        {"last_used": {"$exists": False}},
+        {"$set": {"last_used": dt.datetime.now(dt.timezone.utc)}}
+    )
+    EMBEDDINGS_COLL.create_index("last_used", expireAfterSeconds=EMBEDDINGS_TTL)
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Cache key of a text's embedding, the model and the text's SHA-256."""
+    return f"{model}:{hashlib.sha256(text.encode()).hexdigest()}"
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings checked against the cache before calling the wrapped embeddings.
+    Vectors are stored as float32 bytes, the precision FAISS uses anyway.
+
+    Attributes:
+        embeddings (Embeddings): The embeddings used for texts that aren't cached.
+        model (str): Model name, part of the key so models don't share vectors.
+        collection (Collection): Where vectors are stored.
+        hits (int): Texts whose embedding came from the cache.
+        misses (int): Texts sent to the wrapped embeddings.
+    """
+    def __init__(
+        self, embeddings: Embeddings, model: str, collection: Collection = EMBEDDINGS_COLL
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.collection = collection
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._embed_query = lru_cache(maxsize=QUERY_CACHE_SIZE)(
+            lambda text: tuple(self.embeddings.embed_query(text))
+        )
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts, only calling the wrapped embeddings for uncached ones."""
+        keys = [embedding_key(self.model, text) for text in texts]
+        now = dt.datetime.now(dt.timezone.utc)
+        vectors: dict[str, list[float]] = {
+            document["_id"]: array("f", document["embedding"]).tolist()
+            for document in self.collection.find({"_id": {"$in": list(set(keys))}})
+        }
+
+        # Keep used embeddings from expiring
+        if vectors:
+            self.collection.update_many(
+                {
+                    "_id": {"$in": list(vectors)},
+                    "last_used": {"$lt": now - LAST_USED_RESOLUTION}
+                },
+                {"$set": {"last_used": now}}
+            )
+
+        # Each distinct uncached text is embedded once, and is one miss
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += sum(key in vectors for key in keys)
+
+        if missing:
+            embedded = self.embeddings.embed_documents(list(missing.values()))
+            vectors.update(zip(missing.keys(), embedded))
+
+            try:
+                self.collection.insert_many(
+                    [
+                        {
+                            "_id": key,
+                            "model": self.model,
+                            "embedding": array("f", vectors[key]).tobytes(),
+                            "last_used": now
+                        }
+                        for key in missing
+                    ],
+                    ordered=False
+                )
+            except BulkWriteError:
+                pass  # another worker cached some of the same texts first
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query with the wrapped embeddings, remembering recent queries in memory."""
+        return list(self._embed_query(text))
+
+    def stats(self) -> dict[str, int | float]:
+        """Hits, misses and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
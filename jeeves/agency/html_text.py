@@ -0,0 +1,256 @@
+"""
+Extracting the visible text of web pages for the website answerer.
+
+Engines are interchangeable, set by `Retrieval.html_engine` in `config.yaml`:
+- `lxml`: lxml's C parser feeding events straight into a text collector, no tree
+    is built. Falls back to `stream` if lxml isn't installed.
+- `stream`: the same collector fed by the standard library's `HTMLParser`.
+- `soup`: a full BeautifulSoup tree, the original extraction.
+
+The streaming engines skip scripts, styles and boilerplate like navigation and
+footers as they go, and stop reading the page once it has `max_tokens` of text.
+"""
+from bs4 import BeautifulSoup, UnicodeDammit
+
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+import re
+
+from jeeves.agency import tokenizer
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+
+# Elements whose contents are never visible text
+SKIPPED_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object",
+}
+
+# Page furniture repeated across a site, not part of the content. Not forms, some
+# sites wrap the whole page in one.
+BOILERPLATE_TAGS = {"nav", "footer", "aside", "button", "select", "dialog"}
+
+# Elements without an end tag, or whose end tag may be left out. Never skipped for
+# their attributes, since the standard library parser doesn't close them for us and
+# the skip would never end.
+UNCLOSED_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "source", "track", "wbr",
+    "p", "li", "dt", "dd", "option", "optgroup", "tr", "td", "th", "thead", "tbody",
+    "tfoot", "colgroup", "caption", "rb", "rt", "rtc", "rp", "html", "head", "body",
+}
+
+# Characters of text read per token of budget, generous so trimming is exact
+CHARS_PER_TOKEN = 6
+
+# Characters fed to a streaming parser at a time
+FEED_SIZE = 64 * 1024
+
+_CHARSET = re.compile(rb"""charset=["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+def charset(content_type: str | None) -> str | None:
+    """The charset named in a `Content-Type` header, if any."""
+    declared = _CHARSET.search((content_type or "").encode("latin-1", errors="ignore"))
+    return declared.group(1).decode("ascii") if declared else None
+
+
+def decode(content: bytes, encoding: str | None = None) -> str:
+    """
+    Decode a page with `encoding`, ex. from the response's `Content-Type`, then the
+    charset its markup declares, then UTF-8. If none of those fit the bytes, the
+    encoding is detected like BeautifulSoup does.
+    """
+    declared = _CHARSET.search(content[:2048])
+    candidates = [
+        encoding,
+        declared.group(1).decode("ascii") if declared else None,
+        "utf-8",
+    ]
+
+    for candidate in candidates:
+        if candidate is None:
+            continue
+        try:
+            return content.decode(candidate)
+        except (LookupError, UnicodeDecodeError):
+            continue
+
+    detected = UnicodeDammit(content, is_html=True).unicode_markup
+    return detected if detected is not None else content.decode("utf-8", errors="replace")
+
+
+def trim_to_tokens(text: str, max_tokens: int | None) -> str:
+    """The start of a text, at most `max_tokens` long."""
+    if max_tokens is None or len(text) <= max_tokens:  # a token is at least a character
+        return text
+
+    tokens = tokenizer.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+
+    return tokenizer.get_encoding().decode(tokens[:max_tokens])
+
+
+class _TextCollector:
+    """
+    Collects text from parser events, skipping invisible and boilerplate elements,
+    until it has `max_chars` characters.
+    """
+    def __init__(self, max_chars: int | None):
+        self.max_chars = max_chars
+        self.parts: list[str] = []
+        self.chars = 0
+        self.full = False
+        self._skipping: str | None = None  # tag of the element being skipped
+        self._depth = 0  # nested elements with the skipped tag
+
+    def start(self, tag: str, attrs: dict[str, str | None]) -> None:
+        tag = tag.lower()
+
+        if self._skipping is not None:
+            if tag == self._skipping:
+                self._depth += 1
+            return
+
+        hidden = tag not in UNCLOSED_TAGS and (
+            "hidden" in attrs or attrs.get("aria-hidden") == "true"
+        )
+        if tag in SKIPPED_TAGS or tag in BOILERPLATE_TAGS or hidden:
+            self._skipping, self._depth = tag, 1
+
+    def end(self, tag: str) -> None:
+        if self._skipping is not None and tag.lower() == self._skipping:
+            self._depth -= 1
+            if self._depth == 0:
+                self._skipping = None
+
+    def data(self, text: str) -> None:
+        if self._skipping is not None or self.full:
+            return
+
+        text = text.strip()
+        if not text:
+            return
+
+        self.parts.append(text)
+        self.chars += len(text) + 1
+        if self.max_chars is not None and self.chars >= self.max_chars:
+            self.full = True
+
+    def close(self) -> str:
+        return " ".join(self.parts)
+
+
+class _StdlibParser(HTMLParser):
+    """Standard library parser passing its events to a collector."""
+    def __init__(self, collector: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.collector.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag: str) -> None:
+        self.collector.end(tag)
+
+    def handle_data(self, data: str) -> None:
+        self.collector.data(data)
+
+
+class TextExtractor(ABC):
+    """
+    Extracts a page's visible text, at most `max_tokens` of it.
+
+    Attributes:
+        max_tokens (int | None): Most tokens of text kept, None for all of it.
+    """
+    def __init__(self, max_tokens: int | None = None):
+        self.max_tokens = max_tokens
+
+    @property
+    def name(self) -> str:
+        """Identifies the engine and budget, so cached text from others isn't reused."""
+        return f"{type(self).__name__}:{self.max_tokens}"
+
+    @property
+    def max_chars(self) -> int | None:
+        """Characters read before a streaming engine stops."""
+        return None if self.max_tokens is None else self.max_tokens * CHARS_PER_TOKEN
+
+    def __call__(self, content: bytes, encoding: str | None = None) -> str:
+        return trim_to_tokens(self.extract(content, encoding), self.max_tokens)
+
+    @abstractmethod
+    def extract(self, content: bytes, encoding: str | None = None) -> str:
+        """
+        Text of a page's raw content, before trimming to the budget. `encoding` is
+        the charset the server sent, if any.
+        """
+
+
+class SoupExtractor(TextExtractor):
+    """Full BeautifulSoup tree, every string outside scripts and styles."""
+
+    def extract(self, content: bytes, encoding: str | None = None) -> str:
+        soup = BeautifulSoup(content, "html.parser", from_encoding=encoding)
+
+        for script in soup(["script", "style"]):
+            script.decompose()
+
+        return " ".join(string for string in soup.stripped_strings)
+
+
+class StreamingExtractor(TextExtractor):
+    """Standard library parser events, fed until the budget's read."""
+
+    def extract(self, content: bytes, encoding: str | None = None) -> str:
+        collector = _TextCollector(self.max_chars)
+        parser = _StdlibParser(collector)
+        html = decode(content, encoding)
+
+        for start in range(0, len(html), FEED_SIZE):
+            parser.feed(html[start:start + FEED_SIZE])
+            if collector.full:
+                break
+        else:
+            parser.close()
+
+        return collector.close()
+
+
+class LxmlExtractor(TextExtractor):
+    """lxml parser events, fed until the budget's read."""
+
+    def extract(self, content: bytes, encoding: str | None = None) -> str:
+        collector = _TextCollector(self.max_chars)
+        parser = etree.HTMLParser(target=collector)
+        html = decode(content, encoding)
+
+        for start in range(0, len(html), FEED_SIZE):
+            parser.feed(html[start:start + FEED_SIZE])
+            if collector.full:
+                break
+
+        return parser.close()
+
+
+ENGINES: dict[str, type[TextExtractor]] = {
+    "lxml": LxmlExtractor,
+    "stream": StreamingExtractor,
+    "soup": SoupExtractor,
+}
+
+
+def get_extractor(engine: str, max_tokens: int | None = None) -> TextExtractor:
+    """An extractor by engine name. `lxml` uses `stream` if lxml isn't installed."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown HTML engine {engine}, use one of {list(ENGINES)}.")
+
+    if engine == "lxml" and etree is None:
+        engine = "stream"
+
+    return ENGINES[engine](max_tokens)
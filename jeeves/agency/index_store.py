@@ -0,0 +1,180 @@
+"""
+On-disk store of answerers' FAISS indexes, one per source. Follow-up questions
+about a source load its index instead of converting and indexing it again.
+
+A saved index is used as is for `refresh_after` seconds. After that the source is
+converted again and only re-indexed if its text changed. Indexes unused for
+`max_age` seconds are deleted, then the least recently used until the store fits
+in `max_bytes`.
+"""
+from langchain.embeddings.base import Embeddings
+from langchain.vectorstores import FAISS
+
+from typing import Callable
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+
+META_FILE = "meta.json"
+
+# Seconds before a temporary folder is assumed abandoned by a crashed save
+TEMP_GRACE = 600
+
+
+def _hash(text: str) -> str:
+    """SHA-256 of a text."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class IndexStore:
+    """
+    FAISS indexes saved in a directory, each in a folder named by its source's hash.
+    A folder's metadata file is touched whenever the index is used, so its
+    modification time is when the index was last used.
+
+    Attributes:
+        directory (str): Where indexes are saved.
+        embeddings (Embeddings): Embeddings loaded indexes embed queries with.
+        max_bytes (int): Most bytes of indexes kept.
+        max_age (float): Seconds an unused index is kept.
+        refresh_after (float): Seconds an index is used before its source is checked.
+    """
+    def __init__(
+        self,
+        directory: str,
+        embeddings: Embeddings,
+        max_bytes: int,
+        max_age: float,
+        refresh_after: float,
+    ):
+        self.directory = directory
+        self.embeddings = embeddings
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.refresh_after = refresh_after
+        self._lock = threading.Lock()
+
+    def path(self, source: str) -> str:
+        """Folder of a source's index."""
+        return os.path.join(self.directory, _hash(source)[:32])
+
+    def _read_meta(self, path: str) -> dict | None:
+        try:
+            with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, path: str, meta: dict) -> None:
+        with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def _load(self, path: str) -> FAISS | None:
+        """Load a saved index and mark it used, or None if it can't be read."""
+        try:
+            index = FAISS.load_local(path, self.embeddings)
+            os.utime(os.path.join(path, META_FILE))
+        except Exception:
+            return None
+
+        return index
+
+    def _save(self, path: str, index: FAISS, meta: dict) -> None:
+        """
+        Save an index to a temporary folder first, then swap it in, so a concurrent
+        reader never loads a partial index. The temporary folder is removed if the
+        swap fails, ex. when another worker saves the same source at once.
+        """
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            index.save_local(temp_path)
+            self._write_meta(temp_path, meta)
+
+            with self._lock:
+                shutil.rmtree(path, ignore_errors=True)
+                os.replace(temp_path, path)
+        finally:
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+    def get_or_build(
+        self, source: str, convert: Callable[[], str], build: Callable[[str], FAISS]
+    ) -> FAISS:
+        """
+        The source's index. Loaded from disk if it was checked within
+        `refresh_after`, or if converting the source gives the same text it was built
+        from. Otherwise `build` indexes the converted text and the index is saved.
+        """
+        path = self.path(source)
+        meta = self._read_meta(path)
+
+        if meta is not None and time.time() - meta["checked"] < self.refresh_after:
+            if (index := self._load(path)) is not None:
+                return index
+
+        text = convert()
+        text_hash = _hash(text)
+
+        if meta is not None and meta["text_hash"] == text_hash:
+            if (index := self._load(path)) is not None:
+                meta["checked"] = time.time()
+                self._write_meta(path, meta)
+                return index
+
+        index = build(text)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._save(
+                path, index, {"source": source, "text_hash": text_hash, "checked": time.time()}
+            )
+            self.evict()
+        except OSError:
+            pass  # read-only filesystem, the index is only used for this question
+
+        return index
+
+    def evict(self) -> None:
+        """
+        Delete indexes unused for `max_age`, then the least recently used until the
+        store fits in `max_bytes`. Temporary folders count towards the size, and
+        are deleted once older than `TEMP_GRACE`.
+        """
+        with self._lock:
+            indexes: list[tuple[float, int, str]] = []  # last used, size, path
+            temp_bytes = 0
+            now = time.time()
+
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if not os.path.isdir(path):
+                    continue
+
+                try:
+                    size = sum(entry.stat().st_size for entry in os.scandir(path))
+                    if name.endswith(".tmp"):
+                        if now - os.path.getmtime(path) > TEMP_GRACE:
+                            shutil.rmtree(path, ignore_errors=True)
+                        else:
+                            temp_bytes += size
+                        continue
+
+                    last_used = os.path.getmtime(os.path.join(path, META_FILE))
+                except OSError:
+                    continue
+
+                indexes.append((last_used, size, path))
+
+            indexes.sort()
+            total = temp_bytes + sum(size for _, size, _ in indexes)
+
+            for last_used, size, path in indexes:
+                if now - last_used < self.max_age and total <= self.max_bytes:
+                    break
+
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
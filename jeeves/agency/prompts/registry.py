@@ -0,0 +1,70 @@
+"""
+Prompt templates, read from disk and parsed once per process.
+
+Templates are handed to the agent as is, and parsed once for the variables the
+agent is given each run. Set `GPT.hot_reload_prompts` in `config.yaml` to re-read a
+file whenever it changes, useful when editing prompts during development.
+"""
+import os
+import string
+import threading
+
+
+class ParsedTemplate:
+    """
+    A prompt template and the variables in it, parsed like `str.format` does, so
+    escaped braces aren't variables.
+
+    Example:
+        template = ParsedTemplate("Hello, {something} and {{literal}}.")
+        template.variables  # {"something"}
+    """
+    def __init__(self, template: str):
+        self.template = template
+        self.variables: set[str] = {
+            field
+            for _, field, _, _ in string.Formatter().parse(template)
+            if field is not None
+        }
+
+
+class PromptRegistry:
+    """
+    Parsed prompt templates from a directory of `<name>.txt` files, each read the
+    first time it's used.
+
+    Attributes:
+        directory (str): Directory of the template files.
+        hot_reload (bool): Re-read a file when its modification time changes.
+    """
+    def __init__(self, directory: str, hot_reload: bool = False):
+        self.directory = directory
+        self.hot_reload = hot_reload
+        self._templates: dict[str, tuple[float, ParsedTemplate]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> str:
+        """Path of a template's file."""
+        return os.path.join(self.directory, f"{name}.txt")
+
+    def get(self, name: str) -> ParsedTemplate:
+        """A parsed template by name. Raises FileNotFoundError if there's no file."""
+        cached = self._templates.get(name)
+        if cached is not None and not self.hot_reload:
+            return cached[1]
+
+        try:
+            modified = os.stat(self.path(name)).st_mtime
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Prompt file {name}.txt not found.")
+
+        if cached is not None and cached[0] == modified:
+            return cached[1]
+
+        with self._lock:
+            with open(self.path(name), "r", encoding="utf-8") as f:
+                template = ParsedTemplate(f.read())
+
+            self._templates[name] = (modified, template)
+
+        return template
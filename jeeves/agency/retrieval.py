@@ -2,26 +2,41 @@
 from langchain.chat_models import ChatOpenAI
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.vectorstores import FAISS
-from langchain.text_splitter import TokenTextSplitter
 from langchain.chains.question_answering import load_qa_chain
 
 import requests
 from pymongo import MongoClient
 
-from bs4 import BeautifulSoup
 import requests
 import json
+import os
 from abc import ABC, abstractmethod
+from urllib.parse import urlsplit, urlunsplit
 
 from jeeves import utils
+from jeeves.agency import tokenizer, web_fetch
+from jeeves.agency.bm25 import BM25Index
+from jeeves.agency.html_text import TextExtractor, get_extractor
+from jeeves.agency.embedding_cache import CachedEmbeddings
+from jeeves.agency.index_store import IndexStore
 from keys import KEYS
+from config import CONFIG
 
 
 llm = ChatOpenAI(model_name="gpt-4", openai_api_key=KEYS.OpenAI.api_key, temperature=0)
-embeddings = OpenAIEmbeddings(openai_api_key=KEYS.OpenAI.api_key)
+openai_embeddings = OpenAIEmbeddings(openai_api_key=KEYS.OpenAI.api_key)
+embeddings = CachedEmbeddings(openai_embeddings, model=openai_embeddings.model)
 N_DOCS = 10  # 10 for gpt-4, 5 for 3.5
-splitter = TokenTextSplitter(
-    encoding_name="cl100k_base", chunk_size=300, chunk_overlap=50
+splitter = tokenizer.token_splitter(chunk_size=300, chunk_overlap=50)
+
+
+# Sources' vector indexes, kept between questions
+INDEX_STORE = IndexStore(
+    directory=os.path.join(os.path.dirname(os.path.realpath(__file__)), "index_cache"),
+    embeddings=embeddings,
+    max_bytes=int(CONFIG.Retrieval.index_max_mb * 1024 * 1024),
+    max_age=CONFIG.Retrieval.index_max_age,
+    refresh_after=CONFIG.Retrieval.index_refresh,
 )
 
 
@@ -38,7 +53,18 @@ class ConversionError(Exception):
 
 
 class BaseAnswerer(ABC):
-    """Abstract base class for answerers."""
+    """
+    Abstract base class for answerers. Sources' indexes are saved in `INDEX_STORE`
+    unless `persist_index` is False.
+
+    Answerers with `lexical_prefilter` can skip indexing long sources whole, if
+    `Retrieval.lexical_prefilter` is on. Their chunks are ranked against each query
+    with BM25 and only the best `prefilter_candidates` are embedded, so these
+    indexes are per query and never saved.
+    """
+    persist_index: bool = True
+    lexical_prefilter: bool = False
+    prefilter_candidates: int = 40
 
     def __init__(self, source: str):
         self.source = source
@@ -53,15 +79,58 @@ class BaseAnswerer(ABC):
         Ex. text can be passed as a string, website can be passed as a URL, etc.
         """
 
+    def source_key(self) -> str:
+        """
+        Identifies the source in `INDEX_STORE`. Override to normalize sources that can
+        be written more than one way.
+        """
+        return f"{type(self).__name__}:{self.source}"
+
+    @staticmethod
+    def build_index(text: str) -> FAISS:
+        """Split converted text into chunks and index them."""
+        docs = splitter.create_documents([text])
+        return FAISS.from_documents(docs, embeddings)
+
+    def prefiltered_index(self, text: str, query: str) -> FAISS | None:
+        """
+        Index the chunks that best match the query lexically, in source order. None
+        if the source is short enough to index whole, or if no chunk shares a word
+        with the query, so BM25 can't tell them apart.
+        """
+        docs = splitter.create_documents([text])
+        if len(docs) <= self.prefilter_candidates:
+            return None
+
+        bm25 = BM25Index([doc.page_content for doc in docs])
+        candidates = bm25.top(query, self.prefilter_candidates)
+        if not candidates:
+            return None
+
+        return FAISS.from_documents([docs[i] for i in sorted(candidates)], embeddings)
+
+    def vectorstore(self, query: str) -> FAISS:
+        """The index to search for the query, from `INDEX_STORE` if it's persisted."""
+        convert = self.convert
+
+        if self.lexical_prefilter and CONFIG.Retrieval.lexical_prefilter:
+            text = self.convert()
+            if (index := self.prefiltered_index(text, query)) is not None:
+                return index
+            convert = lambda: text
+
+        if not self.persist_index:
+            return self.build_index(convert())
+
+        return INDEX_STORE.get_or_build(self.source_key(), convert, self.build_index)
+
     def answer(self, query: str, n_docs: int = N_DOCS) -> str:
         """
         First converts the initial source, then queries it. The query must be a string,
         and the answer will be a string. This does not work with the string-in-string-out
         nature of an LLM agent, so it is not exposed to the user.
         """
-        text = self.convert()
-        docs = splitter.create_documents([text])
-        vectorstore = FAISS.from_documents(docs, embeddings)
+        vectorstore = self.vectorstore(query)
 
         _find_similar = lambda k: vectorstore.similarity_search(query, k=k)
         similar_docs = _find_similar(n_docs)
@@ -98,27 +167,38 @@ class BaseAnswerer(ABC):
 
 class TextAnswerer(BaseAnswerer):
     """Answerer for text."""
+    persist_index = False
 
     def convert(self) -> str:
         return self.source
 
 
 class WebsiteAnswerer(BaseAnswerer):
-    """Answerer for websites."""
+    """Answerer for websites. Pages are converted with `extractor`."""
+    extractor: TextExtractor = get_extractor(
+        CONFIG.Retrieval.html_engine, CONFIG.Retrieval.page_max_tokens
+    )
+
+    def source_key(self) -> str:
+        """The URL with its scheme and host lowercased, without a fragment or trailing slash."""
+        url = urlsplit(self.source.strip())
+        path = url.path.rstrip("/")
+        normalized = urlunsplit(
+            (url.scheme.lower(), url.netloc.lower(), path, url.query, "")
+        )
+        return f"WebsiteAnswerer:{normalized}"
 
     def convert(self) -> str:
-        """Convert website to text."""
-        response = requests.get(self.source, headers=utils.REQUEST_HEADERS)
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        for script in soup(["script", "style"]):
-            script.decompose()
-
-        return " ".join(string for string in soup.stripped_strings)
+        """Convert website to text, through the fetch cache."""
+        return web_fetch.fetch_text(self.source, self.extractor)
 
 
 class YouTubeAnswerer(BaseAnswerer):
-    """Answerer for YouTube videos."""
+    """
+    Answerer for YouTube videos. Transcripts of long videos run to hundreds of
+    chunks, so they can be pre-filtered lexically.
+    """
+    lexical_prefilter = True
 
     @staticmethod
     def _video_source_to_url(video_source: str) -> str:
@@ -132,6 +212,10 @@ class YouTubeAnswerer(BaseAnswerer):
 
         raise ValueError(f"Could not parse YouTube video source {video_source}.")
 
+    def source_key(self) -> str:
+        """The video ID, however the video was linked."""
+        return f"YouTubeAnswerer:{self._video_source_to_url(self.source)}"
+
     @staticmethod
     def _video_title(video_url: str) -> str:
         """
@@ -2,14 +2,17 @@
 from langchain.agents.tools import BaseTool
 
 import json
+from functools import lru_cache
 from typing import Any, Coroutine
 
 from jeeves import texts
 
 
+@lru_cache(maxsize=256)
 def create_text_message_tool(inbound_phone: str) -> type[BaseTool]:
     """
-    Create a tool to send text messages.
+    Create a tool to send text messages. The class is created once per phone number
+    and reused.
 
     Args:
         inbound_phone: The phone number to send a confirmation text to after
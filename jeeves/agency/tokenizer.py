@@ -0,0 +1,116 @@
+"""
+Shared tokenizer. Encodings are loaded once per process, and recent token counts
+are kept so the same text (prompt templates, chat messages) isn't encoded twice.
+"""
+import tiktoken
+from langchain.text_splitter import TokenTextSplitter
+
+from collections import OrderedDict
+from functools import cache
+import threading
+
+
+# Encoding used by gpt-4 and the embedding models
+DEFAULT_ENCODING = "cl100k_base"
+
+# Most (encoding, text) token counts remembered
+COUNT_CACHE_SIZE = 4096
+
+
+@cache
+def get_encoding(encoding_name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    """The encoding, loaded the first time it's used."""
+    return tiktoken.get_encoding(encoding_name)
+
+
+def encode(text: str, encoding_name: str = DEFAULT_ENCODING) -> list[int]:
+    """Tokens of a text. Special tokens are encoded as plain text."""
+    return get_encoding(encoding_name).encode_ordinary(text)
+
+
+def encode_batch(texts: list[str], encoding_name: str = DEFAULT_ENCODING) -> list[list[int]]:
+    """Tokens of each text, encoded in parallel."""
+    return get_encoding(encoding_name).encode_ordinary_batch(texts)
+
+
+class _CountCache:
+    """
+    Least recently used token counts, keyed by encoding and text, with hit and miss
+    counts. Locked as it's shared by request threads.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.counts: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple[str, str]) -> int | None:
+        """Cached count, or None if it isn't cached."""
+        with self.lock:
+            if key not in self.counts:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.counts.move_to_end(key)
+            return self.counts[key]
+
+    def put(self, key: tuple[str, str], count: int) -> None:
+        """Store a count, dropping the least recently used if full."""
+        with self.lock:
+            self.counts[key] = count
+            self.counts.move_to_end(key)
+            if len(self.counts) > self.maxsize:
+                self.counts.popitem(last=False)
+
+
+_COUNTS = _CountCache(COUNT_CACHE_SIZE)
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Number of tokens in a text."""
+    key = (encoding_name, text)
+    count = _COUNTS.get(key)
+
+    if count is None:
+        count = len(encode(text, encoding_name))
+        _COUNTS.put(key, count)
+
+    return count
+
+
+def count_tokens_batch(texts: list[str], encoding_name: str = DEFAULT_ENCODING) -> list[int]:
+    """Number of tokens in each text. Texts that aren't cached are encoded together."""
+    counts = [_COUNTS.get((encoding_name, text)) for text in texts]
+    missing = [i for i, count in enumerate(counts) if count is None]
+
+    if missing:
+        tokens = encode_batch([texts[i] for i in missing], encoding_name)
+        for i, text_tokens in zip(missing, tokens):
+            counts[i] = len(text_tokens)
+            _COUNTS.put((encoding_name, texts[i]), counts[i])
+
+    return counts
+
+
+def count_cache_stats() -> dict[str, int | float]:
+    """Hits, misses, hit rate and current size of the token count cache."""
+    lookups = _COUNTS.hits + _COUNTS.misses
+    return {
+        "hits": _COUNTS.hits,
+        "misses": _COUNTS.misses,
+        "hit_rate": _COUNTS.hits / lookups if lookups else 0.0,
+        "size": len(_COUNTS.counts),
+    }
+
+
+@cache
+def token_splitter(chunk_size: int = 300, chunk_overlap: int = 50) -> TokenTextSplitter:
+    """
+    Text splitter that chunks by tokens of the default encoding. One per chunk
+    size, shared by every caller.
+    """
+    return TokenTextSplitter(
+        encoding_name=DEFAULT_ENCODING, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
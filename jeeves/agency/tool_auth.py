@@ -3,9 +3,12 @@ from langchain.agents import Tool
 from langchain.tools import BaseTool
 from langchain.utilities.wolfram_alpha import WolframAlphaAPIWrapper
 from langchain.utilities.zapier import ZapierNLAWrapper
-from langchain.agents.agent_toolkits import ZapierToolkit
+from langchain.tools.zapier.tool import ZapierNLARunAction
 from langchain.callbacks.base import BaseCallbackHandler
 
+import threading
+import time
+
 from keys import KEYS
 from jeeves.permissions import User
 
@@ -72,19 +75,56 @@ NO_AUTH_TOOLS: list[BaseTool] = [
 ]
 
 
+# Seconds a user's Zapier actions are reused before they're listed again
+ZAPIER_ACTIONS_TTL = 600
+
+# Phone to the time their actions were listed and the actions
+_zapier_actions: dict[str, tuple[float, list[dict]]] = {}
+_zapier_actions_lock = threading.Lock()
+
+
+def build_zapier_tools(user: User) -> list[BaseTool]:
+    """
+    Tools for the Zapier actions the user has exposed. Listing the actions is a
+    network call, so they're reused for `ZAPIER_ACTIONS_TTL` seconds. The tools
+    themselves only call Zapier when the agent runs one.
+    """
+    zapier_wrapper = ZapierNLAWrapper(
+        zapier_nla_oauth_access_token=user.zapier_access_token
+    )
+
+    with _zapier_actions_lock:
+        cached = _zapier_actions.get(user.phone)
+
+    if cached is None or time.monotonic() - cached[0] >= ZAPIER_ACTIONS_TTL:
+        cached = (time.monotonic(), zapier_wrapper.list())
+        with _zapier_actions_lock:
+            _zapier_actions[user.phone] = cached
+
+    return [
+        ZapierNLARunAction(
+            action_id=action["id"],
+            zapier_description=action["description"],
+            params_schema=action["params"],
+            api_wrapper=zapier_wrapper,
+        )
+        for action in cached[1]
+    ]
+
+
 def build_tools(
     user: User, callback_handlers: list[BaseCallbackHandler]
 ) -> list[BaseTool]:
-    """Build all authenticated tools given a phone number."""
+    """
+    Build all authenticated tools given a phone number. Tools don't load their
+    backing data until they're used, except Zapier's list of actions, which is
+    cached as the agent's prompt describes them.
+    """
     added_tools: list[BaseTool] = []
 
     # Zapier
     if user.zapier_access_token:
-        zapier_wrapper = ZapierNLAWrapper(
-            zapier_nla_oauth_access_token=user.zapier_access_token
-        )
-        zapier_toolkit = ZapierToolkit.from_zapier_nla_wrapper(zapier_wrapper)
-        added_tools.extend(zapier_toolkit.get_tools())
+        added_tools.extend(build_zapier_tools(user))
 
     # Text messages
     TextToolClass = send_texts.create_text_message_tool(user.phone)
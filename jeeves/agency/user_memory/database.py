@@ -7,7 +7,6 @@ from pymongo import MongoClient
 from langchain.schema import Document
 from langchain.chat_models import ChatOpenAI
 from langchain.embeddings import OpenAIEmbeddings
-from langchain.text_splitter import TokenTextSplitter
 from langchain.vectorstores import FAISS
 from langchain.chains.question_answering import load_qa_chain
 
@@ -18,6 +17,8 @@ from config import CONFIG
 from keys import KEYS
 
 from jeeves.utils import validate_phone_number
+from jeeves.agency import tokenizer
+from jeeves.agency.embedding_cache import CachedEmbeddings
 from jeeves.agency.user_memory.models import Entry
 
 
@@ -27,10 +28,15 @@ MEMORY_COLL = MongoClient(KEYS.MongoDB.connect_str)["Jeeves"]["user_memory"]
 
 # Question answering stuff
 llm = ChatOpenAI(model_name="gpt-4", openai_api_key=KEYS.OpenAI.api_key, temperature=0)
-embeddings = OpenAIEmbeddings(openai_api_key=KEYS.OpenAI.api_key)
-splitter = TokenTextSplitter(
-    encoding_name="cl100k_base", chunk_size=300, chunk_overlap=50
-)
+openai_embeddings = OpenAIEmbeddings(openai_api_key=KEYS.OpenAI.api_key)
+embeddings = CachedEmbeddings(openai_embeddings, model=openai_embeddings.model)
+splitter = tokenizer.token_splitter(chunk_size=300, chunk_overlap=50)
+
+
+def _load_entries(user_phone: str) -> list[Entry]:
+    """Get all of a user's entries from the database."""
+    entries = MEMORY_COLL.find({"user_phone": validate_phone_number(user_phone)})
+    return [Entry(**entry) for entry in entries]
 
 
 class UserMemory:
@@ -39,19 +45,31 @@ class UserMemory:
     with a timestamp.
     
     Initialize using the `from_user_phone` classmethod. This will fetch
-    all entries from the database. Then, use `add_entry` to add an entry
+    all entries from the database. Or initialize directly to fetch them only
+    when they're first needed. Then, use `add_entry` to add an entry
     to the user's memory. Finally, use `answer_question` to answer a question
     using the user's memory.
     """
-    def __init__(self, user_phone: str, entries: list[Entry]):
-        self.entries = entries
+    def __init__(self, user_phone: str, entries: list[Entry] | None = None):
+        """
+        If `entries` aren't given, they're loaded from the database the first time
+        they're needed. Adding an entry doesn't need them.
+        """
+        self._entries = entries
         self.user_phone = validate_phone_number(user_phone)
 
     @classmethod
     def from_user_phone(cls, user_phone: str) -> "UserMemory":
         """Get all entries from a user."""
-        entries = MEMORY_COLL.find({"user_phone": validate_phone_number(user_phone)})
-        return cls(user_phone=user_phone, entries=[Entry(**entry) for entry in entries])
+        return cls(user_phone=user_phone, entries=_load_entries(user_phone))
+
+    @property
+    def entries(self) -> list[Entry]:
+        """All of the user's entries, loaded on first access."""
+        if self._entries is None:
+            self._entries = _load_entries(self.user_phone)
+
+        return self._entries
 
     def add_entry(self, content: str) -> bool:
         """Add an entry to the user's memory."""
@@ -61,7 +79,10 @@ class UserMemory:
             content=content
         )
 
-        self.entries.append(entry)
+        # Only keep the local store in sync if it's been loaded
+        if self._entries is not None:
+            self._entries.append(entry)
+
         MEMORY_COLL.insert_one(entry.to_dict())
         return True
 
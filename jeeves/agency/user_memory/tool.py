@@ -7,7 +7,8 @@ from jeeves.agency.user_memory.prompts import STORER_PROMPT, ANSWERER_PROMPT
 
 def create_user_memory_tools(user_phone: str) -> list[Tool]:
     """
-    Create tools for the user memory.
+    Create tools for the user memory. The user's entries are only loaded from the
+    database if the agent questions their memory.
 
     Args:
         user_phone (str): User phone number.
@@ -15,7 +16,7 @@ def create_user_memory_tools(user_phone: str) -> list[Tool]:
     Returns:
         list[Tool]: List of two tools, one for storing and one for retrieving.
     """
-    user_memory = UserMemory.from_user_phone(user_phone)
+    user_memory = UserMemory(user_phone)
 
     return [
         Tool(
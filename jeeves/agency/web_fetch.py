@@ -0,0 +1,275 @@
+"""
+Fetching web pages for the website answerer. Pages are fetched through a pooled
+session and kept on disk with the text extracted from them, so asking about the
+same page again skips both the request and the parse while it's fresh.
+
+A page is fresh for its `Cache-Control` max-age or `Expires`, capped at
+`Retrieval.fetch_max_ttl`, or for `Retrieval.fetch_ttl` if it sends neither. Stale
+pages are revalidated with `If-None-Match` and `If-Modified-Since`, so an
+unchanged page costs a `304` and no parse.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import hashlib
+import json
+import os
+import threading
+import time
+
+from jeeves import utils
+from jeeves.agency.html_text import TextExtractor, charset
+from config import CONFIG
+
+
+def _session() -> requests.Session:
+    """Session with a connection pool shared by every fetch."""
+    session = requests.Session()
+    session.headers.update(utils.REQUEST_HEADERS)
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = _session()
+
+
+def freshness(headers: dict[str, str], default_ttl: float, max_ttl: float) -> float | None:
+    """
+    Seconds a response can be used without revalidating, from its `Cache-Control`
+    and `Expires` headers. None if it mustn't be stored at all.
+    """
+    directives: dict[str, str | None] = {}
+    for directive in headers.get("Cache-Control", "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name] = value.strip('"') or None
+
+    if "no-store" in directives:
+        return None
+
+    if "no-cache" in directives:
+        return 0
+
+    for name in ("s-maxage", "max-age"):
+        if (directives.get(name) or "").isdigit():
+            return min(int(directives[name]), max_ttl)
+
+    if expires := headers.get("Expires"):
+        try:
+            expires_in = parsedate_to_datetime(expires).timestamp() - time.time()
+            return min(max(expires_in, 0), max_ttl)
+        except (TypeError, ValueError):
+            return 0  # invalid dates mean already expired
+
+    return min(default_ttl, max_ttl)
+
+
+@dataclass
+class CachedPage:
+    """
+    A stored response and the text extracted from it.
+
+    Attributes:
+        url (str): The requested URL.
+        expires (float): Timestamp until which the page is used without revalidating.
+        etag (str | None): The response's `ETag`, for `If-None-Match`.
+        last_modified (str | None): The response's `Last-Modified`.
+        extractor (str): Name of the extractor that extracted `text`.
+        text (str): Text extracted from the page.
+        encoding (str | None): Charset from the response's `Content-Type`, if any.
+    """
+    url: str
+    expires: float
+    etag: str | None
+    last_modified: str | None
+    extractor: str
+    text: str
+    encoding: str | None = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Headers asking the server to answer `304` if the page hasn't changed."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class FetchCache:
+    """
+    Pages saved in a directory, a `.json` file of metadata and extracted text and a
+    `.body` file of the raw response, each named by the URL's hash. The body is
+    kept so the text can be extracted again without a request if the extractor
+    changes. Files are touched when used and the least recently used are deleted
+    once the cache is over `max_bytes`.
+
+    Attributes:
+        directory (str): Where pages are saved.
+        default_ttl (float): Seconds a page without caching headers is fresh.
+        max_ttl (float): Most seconds any page is fresh.
+        max_bytes (int): Most bytes of pages kept.
+    """
+    def __init__(self, directory: str, default_ttl: float, max_ttl: float, max_bytes: int):
+        self.directory = directory
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path(self, url: str) -> str:
+        """Path of a page's files, without the extension."""
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest()[:32])
+
+    def load(self, url: str) -> CachedPage | None:
+        """A saved page, or None if it isn't saved or can't be read."""
+        path = self.path(url)
+        try:
+            with open(f"{path}.json", "r", encoding="utf-8") as f:
+                page = CachedPage(**json.load(f))
+            os.utime(f"{path}.json")
+        except (OSError, ValueError, TypeError):
+            return None
+
+        return page if page.url == url else None
+
+    def load_body(self, url: str) -> bytes | None:
+        """A saved page's raw response."""
+        try:
+            with open(f"{self.path(url)}.body", "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, path: str, data: bytes) -> None:
+        """Write through a temporary file so readers never see a partial file."""
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def save(self, page: CachedPage, body: bytes | None = None) -> None:
+        """
+        Save a page's metadata and text, and its body if given. Does nothing if the
+        directory can't be written to.
+        """
+        path = self.path(page.url)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if body is not None:
+                self._write(f"{path}.body", body)
+            self._write(f"{path}.json", json.dumps(page.__dict__).encode())
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        """Delete the least recently used pages until the cache fits in `max_bytes`."""
+        with self._lock:
+            pages: list[tuple[float, int, str]] = []  # last used, size, path
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                return
+
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+
+                path = os.path.join(self.directory, name.removesuffix(".json"))
+                try:
+                    last_used = os.path.getmtime(f"{path}.json")
+                    size = os.path.getsize(f"{path}.json")
+                    if os.path.exists(f"{path}.body"):
+                        size += os.path.getsize(f"{path}.body")
+                except OSError:
+                    continue
+
+                pages.append((last_used, size, path))
+
+            pages.sort()
+            total = sum(size for _, size, _ in pages)
+
+            for _, size, path in pages:
+                if total <= self.max_bytes:
+                    break
+
+                for extension in (".json", ".body"):
+                    try:
+                        os.remove(f"{path}{extension}")
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+
+FETCH_CACHE = FetchCache(
+    directory=os.path.join(os.path.dirname(os.path.realpath(__file__)), "fetch_cache"),
+    default_ttl=CONFIG.Retrieval.fetch_ttl,
+    max_ttl=CONFIG.Retrieval.fetch_max_ttl,
+    max_bytes=int(CONFIG.Retrieval.fetch_cache_mb * 1024 * 1024),
+)
+
+
+def fetch_text(
+    url: str, extractor: TextExtractor, cache: FetchCache = FETCH_CACHE
+) -> str:
+    """
+    Text of a web page, extracted from its raw content by `extractor`. Uses the
+    cached text while the page is fresh or the server says it hasn't changed, and
+    only requests and extracts the page otherwise.
+    """
+    page = cache.load(url)
+
+    # Text from another extractor is extracted again from the saved body
+    if page is not None and page.extractor != extractor.name:
+        if (body := cache.load_body(url)) is None:
+            page = None
+        else:
+            page.text, page.extractor = extractor(body, page.encoding), extractor.name
+            cache.save(page)
+
+    if page is not None and page.fresh:
+        return page.text
+
+    response = SESSION.get(
+        url,
+        headers=page.conditional_headers() if page else None,
+        timeout=CONFIG.Retrieval.fetch_timeout,
+    )
+    ttl = freshness(response.headers, cache.default_ttl, cache.max_ttl)
+
+    if response.status_code == 304 and page is not None:
+        page.expires = time.time() + (ttl or 0)
+        cache.save(page)
+        return page.text
+
+    # Only a charset the server named, requests assumes latin-1 for any text type
+    encoding = charset(response.headers.get("Content-Type"))
+    text = extractor(response.content, encoding)
+
+    # Error pages are answered from but not stored
+    if not response.ok or ttl is None:
+        return text
+
+    page = CachedPage(
+        url=url,
+        expires=time.time() + ttl,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        extractor=extractor.name,
+        text=text,
+        encoding=encoding,
+    )
+
+    cache.save(page, response.content)
+    cache.evict()
+
+    return text
@@ -68,11 +68,8 @@ def _classify(item: str, setup: str) -> tuple[str, str]:
     Determines the category of item. Returns an empty string if no category
     is matched. Returns a tuple of category and item useful if translated.
     """
-    check_item = _check_item_format(item)
-
-    for category in utils.MAPPING(setup):
-        if check_item in utils.MAPPING(setup)[category]:
-            return category, item
+    if entry := utils.ITEM_INDEX(setup).get(_check_item_format(item)):
+        return entry[0], item
 
     return "", item  # always return a translation to english
 
@@ -81,14 +78,14 @@ def _order_classification(
     classification: dict, setup: str
 ) -> dict[str, list[tuple[int, str]]]:
     """Reorder categories to match the mapping."""
+    item_index = utils.ITEM_INDEX(setup)
+
     for category in classification:
         if category == "none":
             continue
         classification[category] = sorted(
             classification[category],
-            key=lambda item: utils.MAPPING(setup)[category].index(
-                _check_item_format(item[1])
-            ),
+            key=lambda item: item_index[_check_item_format(item[1])][2],
         )
 
     classification_keys = list(classification.keys())
@@ -98,10 +95,9 @@ def _order_classification(
     else:
         none_present = False
 
-    key_order = sorted(
-        classification_keys,
-        key=lambda category: list(utils.MAPPING(setup).keys()).index(category),
-    )
+    key_order = [
+        category for category in utils.MAPPING(setup) if category in classification_keys
+    ]
 
     if none_present:
         key_order.append("none")
@@ -0,0 +1,107 @@
+"""
+Bounded memo of inflect results. inflect is slow and grocery vocabulary is small
+and repetitive, so the same few words are singularized and pluralized constantly.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+
+class InflectionCache:
+    """
+    Least recently used memo of word inflections, with hit and miss counts. Locked
+    as it's shared by inbound handling threads.
+
+    Attributes:
+        maxsize (int): Most words kept before the least recently used is dropped.
+        words (OrderedDict[str, str]): Word to inflection, least recent first.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that called the inflection function.
+        unsaved (int): Words added since the cache was last saved.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.words: OrderedDict[str, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.unsaved = 0
+        self.lock = threading.Lock()
+
+    def get(self, word: str, inflect_word: Callable[[str], str]) -> str:
+        """Inflection of `word`, calling `inflect_word` only if it isn't cached."""
+        with self.lock:
+            inflection = self.words.get(word)
+            if inflection is not None:
+                self.hits += 1
+                self.words.move_to_end(word)
+                return inflection
+
+            self.misses += 1
+
+        # Outside the lock, inflect is slow
+        inflection = inflect_word(word)
+        self.put(word, inflection)
+        with self.lock:
+            self.unsaved += 1
+        return inflection
+
+    def put(self, word: str, inflection: str) -> None:
+        """Store an inflection without counting a lookup, ex. when pre-warming."""
+        with self.lock:
+            self.words[word] = inflection
+            self.words.move_to_end(word)
+            if len(self.words) > self.maxsize:
+                self.words.popitem(last=False)
+
+    def stats(self) -> dict[str, int | float]:
+        """Hits, misses, hit rate and current size."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self.words),
+            }
+
+
+def save_caches(caches: dict[str, InflectionCache], path: str, key: str) -> None:
+    """
+    Write each cache's words to a JSON file, with the `key` they're valid for, ex.
+    a hash of the files they were warmed from. Written to a temporary file first so
+    a concurrent reader never sees a partial file.
+    """
+    saved = {}
+    for name, cache in caches.items():
+        with cache.lock:
+            saved[name] = dict(cache.words)
+            cache.unsaved = 0
+
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"key": key, "caches": saved}, f)
+
+    os.replace(temp_path, path)
+
+
+def load_caches(caches: dict[str, InflectionCache], path: str, key: str) -> bool:
+    """
+    Fill caches from a file written by `save_caches` with the same `key`. Returns
+    False if there's no readable file, or it was saved for another key.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved: dict = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    if not isinstance(saved, dict) or saved.get("key") != key:
+        return False
+
+    for name, cache in caches.items():
+        for word, inflection in saved["caches"].get(name, {}).items():
+            cache.put(word, inflection)
+
+    return True
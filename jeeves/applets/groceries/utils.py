@@ -3,11 +3,22 @@ Utils.
 """
 import mypytoolkit as kit
 
+import atexit
+import hashlib
 import json
 import os
+import threading
+from functools import cache
+from typing import Callable
 
 import inflect
 
+from jeeves.applets.groceries.inflection_cache import (
+    InflectionCache,
+    load_caches,
+    save_caches,
+)
+
 
 # Create inflect engine for pluralization and singularization
 inflect_engine = inflect.engine()
@@ -17,34 +28,72 @@ inflect_engine = inflect.engine()
 
 current_dir = os.path.dirname(os.path.realpath(__file__))
 
-with open(os.path.join(current_dir, "pluralization_replacements.json")) as f:
-    PLURAL_REPLACEMENTS: dict[str, str] = json.load(f)
+with open(os.path.join(current_dir, "pluralization_replacements.json"), "rb") as f:
+    _replacements_bytes = f.read()
+    PLURAL_REPLACEMENTS: dict[str, str] = json.loads(_replacements_bytes)
     SINGULAR_REPLACEMENTS = {val: key for key, val in PLURAL_REPLACEMENTS.items()}
 
-with open(os.path.join(current_dir, "mapping.json")) as f:
-    RAW_MAPPING: dict[str, list[str]] = json.load(f)
+with open(os.path.join(current_dir, "mapping.json"), "rb") as f:
+    _mapping_bytes = f.read()
+    RAW_MAPPING: dict[str, list[str]] = json.loads(_mapping_bytes)
 
 with open(os.path.join(current_dir, "setups.json")) as f:
     SETUPS: dict[str, list[str]] = json.load(f)
 
+# Memos of inflect results, replacements are checked before them
+INFLECTION_CACHE_SIZE = 4096
+INFLECTION_CACHE_PATH = os.path.join(current_dir, "inflection_cache.json")
+
+# Words inflected at runtime before the caches are saved again
+INFLECTION_SAVE_EVERY = 50
+
+# The saved caches are only used while the files they were warmed from are unchanged
+INFLECTION_CACHE_KEY = hashlib.sha256(_mapping_bytes + _replacements_bytes).hexdigest()
+
+SINGULAR_CACHE = InflectionCache(INFLECTION_CACHE_SIZE)
+PLURAL_CACHE = InflectionCache(INFLECTION_CACHE_SIZE)
+INFLECTION_CACHES = {"singular": SINGULAR_CACHE, "plural": PLURAL_CACHE}
+
+_warmed = False
+_warm_lock = threading.Lock()
+
 
 def MAPPING(setup: str = None) -> dict[str, list[str]]:
     """Return a mapping for a given setup. Default is the raw mapping."""
     if setup is None:
         return RAW_MAPPING
 
-    return kit.reorder_dict(SETUPS[setup.title()], RAW_MAPPING)
+    return _setup_mapping(setup.title())
 
 
-def pluralize(word: str) -> str:
+@cache
+def _setup_mapping(setup: str) -> dict[str, list[str]]:
+    """Mapping reordered for a setup, built once per setup. Don't modify it."""
+    return kit.reorder_dict(SETUPS[setup], RAW_MAPPING)
+
+
+def ITEM_INDEX(setup: str = None) -> dict[str, tuple[str, int, int]]:
     """
-    Use the pattern library to smartly and correctly pluralize the word.
+    Index of a setup's mapping, from singular item to its category, the category's
+    position in the setup, and the item's position in the category. Items listed
+    more than once keep their first position, like searching the mapping would.
     """
-    assert isinstance(word, str)
+    return _item_index(setup.title() if setup is not None else None)
 
-    if word in PLURAL_REPLACEMENTS:
-        return PLURAL_REPLACEMENTS[word]
 
+@cache
+def _item_index(setup: str | None) -> dict[str, tuple[str, int, int]]:
+    """Item index built once per setup. Don't modify it."""
+    index = {}
+    for category_rank, (category, items) in enumerate(MAPPING(setup).items()):
+        for item_rank, item in enumerate(items):
+            index.setdefault(item, (category, category_rank, item_rank))
+
+    return index
+
+
+def _inflect_plural(word: str) -> str:
+    """Plural of a word according to inflect."""
     # If the word is already plural
     if inflect_engine.singular_noun(word) == inflect_engine.plural(word):
         return word
@@ -52,6 +101,47 @@ def pluralize(word: str) -> str:
     return inflect_engine.plural_noun(word)
 
 
+def _inflect_singular(word: str) -> str:
+    """Singular of a word according to inflect."""
+    if not (singular := inflect_engine.singular_noun(word)):
+        return word
+
+    return singular
+
+
+def _cached_inflection(
+    inflection_cache: InflectionCache, word: str, inflect_word: Callable[[str], str]
+) -> str:
+    """
+    Inflection through a cache, warmed on first use. Saves the caches once enough
+    new words have been inflected, so they outlive the process.
+    """
+    if not _warmed:
+        warm_inflection_cache()
+
+    inflection = inflection_cache.get(word, inflect_word)
+
+    if inflection_cache.unsaved >= INFLECTION_SAVE_EVERY:
+        try:
+            save_inflection_cache()
+        except OSError:  # read-only filesystem, keep the words in memory
+            pass
+
+    return inflection
+
+
+def pluralize(word: str) -> str:
+    """
+    Use the pattern library to smartly and correctly pluralize the word.
+    """
+    assert isinstance(word, str)
+
+    if word in PLURAL_REPLACEMENTS:
+        return PLURAL_REPLACEMENTS[word]
+
+    return _cached_inflection(PLURAL_CACHE, word, _inflect_plural)
+
+
 def singularize(word: str) -> str:
     """
     Use the pattern library to smartly and correctly pluralize the word.
@@ -61,7 +151,58 @@ def singularize(word: str) -> str:
     if word in SINGULAR_REPLACEMENTS:
         return SINGULAR_REPLACEMENTS[word]
 
-    if not (singular := inflect_engine.singular_noun(word)):
-        return word
+    return _cached_inflection(SINGULAR_CACHE, word, _inflect_singular)
 
-    return singular
+
+def inflection_stats() -> dict[str, dict[str, int | float]]:
+    """Hit rates and sizes of the singular and plural caches."""
+    return {name: cache.stats() for name, cache in INFLECTION_CACHES.items()}
+
+
+def save_inflection_cache(path: str = INFLECTION_CACHE_PATH) -> None:
+    """Persist the singular and plural caches to disk."""
+    save_caches(INFLECTION_CACHES, path, INFLECTION_CACHE_KEY)
+
+
+def warm_inflection_cache(path: str = INFLECTION_CACHE_PATH) -> None:
+    """
+    Load the persisted caches if they were saved for the current mapping and
+    replacements. Otherwise inflect the mapping's items and their plurals and
+    persist them. Words in the replacements never reach the caches, so they're
+    skipped. Doesn't count towards the hit rate. Runs once, on first use.
+    """
+    global _warmed
+
+    with _warm_lock:
+        if _warmed:
+            return
+
+        if not load_caches(INFLECTION_CACHES, path, INFLECTION_CACHE_KEY):
+            for items in RAW_MAPPING.values():
+                for item in items:
+                    if item in PLURAL_REPLACEMENTS:
+                        continue
+
+                    plural = _inflect_plural(item)
+                    PLURAL_CACHE.put(item, plural)
+                    SINGULAR_CACHE.put(item, _inflect_singular(item))
+                    SINGULAR_CACHE.put(plural, _inflect_singular(plural))
+
+            try:
+                save_inflection_cache(path)
+            except OSError:  # read-only filesystem, keep the warm caches in memory
+                pass
+
+        _warmed = True
+
+
+def _save_on_exit() -> None:
+    """Save words inflected since the last save when the process exits."""
+    if _warmed and any(cache.unsaved for cache in INFLECTION_CACHES.values()):
+        try:
+            save_inflection_cache()
+        except OSError:
+            pass
+
+
+atexit.register(_save_on_exit)
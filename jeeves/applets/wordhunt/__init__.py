@@ -1,8 +1,15 @@
 """WordHunt board solving app."""
 from jeeves import utils
+from config import CONFIG
 
-# import pyximport; pyximport.install(language_level=3)
-from jeeves.applets.wordhunt import pure_wordhunt as wordhunt
+# Use the compiled backend when it's built, it has the same API
+if CONFIG.WordHunt.compiled_backend:
+    try:
+        from jeeves.applets.wordhunt import cy_wordhunt as wordhunt
+    except ImportError:
+        from jeeves.applets.wordhunt import pure_wordhunt as wordhunt
+else:
+    from jeeves.applets.wordhunt import pure_wordhunt as wordhunt
 
 
 APP_HELP = (
@@ -11,18 +18,24 @@ APP_HELP = (
 APP_OPTIONS = {
     "height": "board height, default 4",
     "width": "board width, default 4",
-    "limit": "max number of results, default 20"
+    "limit": "max number of results, default 20",
+    "min_length": "shortest word to find, default 3",
+    "max_length": "longest word to find, default the whole board"
 }
 
 
 @utils.app_handler(APP_HELP, APP_OPTIONS)
 def handler(content: str, options: dict) -> str:
+    # Rows may be sent separated by spaces or lines
+    content = "".join(content.split()).lower()
     if not content:
         return "You must provide the board layout as content."
 
     height = int(options.get("height", 4))
     width = int(options.get("width", 4))
     limit = int(options.get("limit", 20))
+    min_len = int(options.get("min_length", wordhunt.MIN_WORD_LENGTH))
+    max_len = int(options["max_length"]) if "max_length" in options else None
 
     if len(content) != height * width:
         return (
@@ -30,4 +43,11 @@ def handler(content: str, options: dict) -> str:
             f"{len(content)} long board."
         )
 
-    return wordhunt.Board.from_letters(content, width, height).print_results(limit)
+    try:
+        board = wordhunt.Board.from_letters(content, width, height, min_len, max_len)
+    except ValueError as e:
+        return str(e)
+
+    # Repeated boards are answered from the cache
+    wordhunt.solve_many([board])
+    return board.print_results(limit)
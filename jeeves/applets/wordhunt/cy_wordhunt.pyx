@@ -1,239 +1,144 @@
-"""Backend for generating solutions to a WordHunt board."""
-from apps.wordhunt.dictionary import load_dict
-
-
-# Load the dictionary
-cdef set dictionary = load_dict()
-
-
-cdef is_word(word: str):
-    """
-    Checks if a word is a valid dictionary word.
-    """
-    return word in dictionary
-
-
-class Board:
-    def __init__(self, board: list):
-        self.board = board
-        self.height = len(board)
-        self.width = len(board[0])
-        self.x_top = self.width - 1
-        self.y_top = self.height - 1
-        self.results = []
-
-    @classmethod
-    def from_letters(cls, letters: str, width: int, height: int) -> "Board":
-        """
-        Gathers letters from user input and returns a two-dimensional array.
-        """
-        cdef int total_characters = width * height
-        if not len(letters) == total_characters:
-            raise ValueError(
-                f"A board with the dimensions you specified has {total_characters} "
-                "total letters."
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled backend for generating solutions to a WordHunt board. Same API as
+`pure_wordhunt`, with the trie search running over C arrays. Boards of more than
+64 cells fall back to the pure Python search, since visited cells are tracked in
+a 64 bit mask.
+
+Build in place with `cythonize -i -3 jeeves/applets/wordhunt/cy_wordhunt.pyx`.
+"""
+from jeeves.applets.wordhunt import pure_wordhunt, trie
+from jeeves.applets.wordhunt.pure_wordhunt import (
+    MIN_WORD_LENGTH,
+    PARALLEL_MIN_CELLS,
+    SOLVE_CACHE_SIZE,
+    load_trie,
+    is_word,
+    find_words,
+    trie_possibilities,
+    solve_many,
+    solve_cache_info,
+    all_possibilities,
+    print_results,
+    _circle_around,
+)
+
+
+cdef extern from *:
+    int __builtin_popcount(unsigned int)
+
+
+cdef enum:
+    MAX_CELLS = 64
+    MAX_NEIGHBOURS = 8
+
+
+cdef unsigned int TERMINAL = trie.TERMINAL
+
+
+cdef struct Search:
+    const unsigned int* nodes
+    int* neighbours  # MAX_NEIGHBOURS per cell, padded with -1
+    unsigned int* letter_bits
+    char* letters
+    char* word
+    int min_len
+    int max_len
+
+
+cdef void _search(
+    Search* s,
+    int cell,
+    unsigned int node,
+    int length,
+    unsigned long long visited,
+    int start,
+    dict found,
+) except *:
+    cdef int i, neighbour
+    cdef unsigned int mask, bit, next_node
+    cdef str word
+
+    for i in range(MAX_NEIGHBOURS):
+        neighbour = s.neighbours[cell * MAX_NEIGHBOURS + i]
+        if neighbour < 0:
+            break
+        if visited & (1ULL << neighbour):
+            continue
+
+        mask = s.nodes[2 * node]
+        bit = s.letter_bits[neighbour]
+        if not mask & bit:
+            continue
+        next_node = s.nodes[2 * node + 1] + __builtin_popcount(mask & (bit - 1))
+
+        s.word[length] = s.letters[neighbour]
+        if length + 1 >= s.min_len and s.nodes[2 * next_node] & TERMINAL:
+            word = s.word[:length + 1].decode("ascii")
+            if word not in found:
+                found[word] = start
+
+        if length + 1 < s.max_len:
+            _search(
+                s, neighbour, next_node, length + 1,
+                visited | (1ULL << neighbour), start, found,
             )
 
-        cdef list board = []
-        cdef int counter = 0
-        for _ in range(height):
-            board.append(letters[counter : counter + width])
-            counter += width
-
-        return cls(board)
-        
-
-    def query(self, x: int, y: int):
-        """
-        Return 1, 0 instead of 0, 1 becaues we want to query in the format
-        x, y, not y, x.
-        """
-        return self.board[y][x]
-
-    def solve(self) -> list:
-        self.results = all_possibilities(self)
-        return self.results
-
-    def print_results(self, limit: int = 1000):
-        if not self.results:
-            self.solve()
-
-        return print_results(self.results, limit=limit)
-
-    def __str__(self):
-        return "\n".join([str(row) for row in self.board])
-
 
-cdef list _circle_around(tuple coordinates, board: Board):
+def _search_cells(board, cells) -> dict:
     """
-    Returns all coordinate possibilities of circling around a letter by coordinate.
+    Compiled version of `pure_wordhunt._search_cells`, same results in the same
+    order.
     """
-    def on_grid(coordinates: tuple):
-        if 0 <= coordinates[0] <= board.x_top:
-            if 0 <= coordinates[1] <= board.y_top:
-                return True
-        return False
-
-    # Aliases
-    c = coordinates
-    cdef int x = 0
-    cdef int y = 1
-
-    cdef list possibilities = []
-    possibilities.append((c[x], c[y] - 1))
-    possibilities.append((c[x] + 1, c[y] - 1))
-    possibilities.append((c[x] + 1, c[y]))
-    possibilities.append((c[x] + 1, c[y] + 1))
-    possibilities.append((c[x], c[y] + 1))
-    possibilities.append((c[x] - 1, c[y] + 1))
-    possibilities.append((c[x] - 1, c[y]))
-    possibilities.append((c[x] - 1, c[y] - 1))
-
-    for coordinate in possibilities[:]:
-        if not on_grid(coordinate):
-            possibilities.remove(coordinate)
-
-    return possibilities
-
-
-def all_possibilities(board: Board):
-    cdef list wordstuple = []
-
-    def duplicate(word) -> bool:
-        return word in [_[1] for _ in words]
-
-    cdef int y
-    cdef str row
-    cdef int x
-    cdef str character
-    cdef list words = []
-
-    cdef tuple p2
-    cdef tuple p3
-    cdef tuple p4
-    cdef tuple p5
-    cdef tuple p6
-    cdef tuple p7
-    cdef tuple p8
-    cdef tuple p9
-
-    for y, row in enumerate(board.board):
-        for x, character in enumerate(row):
-            for p2 in _circle_around((x, y), board):
-                for p3 in _circle_around(p2, board):
-                    if p3 in [(x, y), p2]:
-                        continue
-                    word: str = "".join([character, board.query(*p2), board.query(*p3)])
-                    if not duplicate(word) and is_word(word):
-                        words.append(((x, y), word))
-                    for p4 in _circle_around(p3, board):
-                        if p4 in [(x, y), p2, p3]:
-                            continue
-                        word = "".join(
-                            [character, board.query(*p2), board.query(*p3), board.query(*p4)]
-                        )
-                        if not duplicate(word) and is_word(word):
-                            words.append(((x, y), word))
-                        for p5 in _circle_around(p4, board):
-                            if p5 in [(x, y), p2, p3, p4]:
-                                continue
-                            word = "".join(
-                                [
-                                    character,
-                                    board.query(*p2),
-                                    board.query(*p3),
-                                    board.query(*p4),
-                                    board.query(*p5),
-                                ]
-                            )
-                            if not duplicate(word) and is_word(word):
-                                words.append(((x, y), word))
-                            for p6 in _circle_around(p5, board):
-                                if p6 in [(x, y), p2, p3, p4, p5]:
-                                    continue
-                                word = "".join(
-                                    [
-                                        character,
-                                        board.query(*p2),
-                                        board.query(*p3),
-                                        board.query(*p4),
-                                        board.query(*p5),
-                                        board.query(*p6),
-                                    ]
-                                )
-                                if not duplicate(word) and is_word(word):
-                                    words.append(((x, y), word))
-                                for p7 in _circle_around(p6, board):
-                                    if p7 in [(x, y), p2, p3, p4, p5, p6]:
-                                        continue
-                                    word = "".join(
-                                        [
-                                            character,
-                                            board.query(*p2),
-                                            board.query(*p3),
-                                            board.query(*p4),
-                                            board.query(*p5),
-                                            board.query(*p6),
-                                            board.query(*p7),
-                                        ]
-                                    )
-                                    if not duplicate(word) and is_word(word):
-                                        words.append(((x, y), word))
-                                    for p8 in _circle_around(p7, board):
-                                        if p8 in [(x, y), p2, p3, p4, p5, p6, p7]:
-                                            continue
-                                        word = "".join(
-                                            [
-                                                character,
-                                                board.query(*p2),
-                                                board.query(*p3),
-                                                board.query(*p4),
-                                                board.query(*p5),
-                                                board.query(*p6),
-                                                board.query(*p7),
-                                                board.query(*p8),
-                                            ]
-                                        )
-                                        if not duplicate(word) and is_word(word):
-                                            words.append(((x, y), word))
-                                        for p9 in _circle_around(p8, board):
-                                            if p9 in [
-                                                (x, y),
-                                                p2,
-                                                p3,
-                                                p4,
-                                                p5,
-                                                p6,
-                                                p7,
-                                                p8,
-                                            ]:
-                                                continue
-                                            word = "".join(
-                                                [
-                                                    character,
-                                                    board.query(*p2),
-                                                    board.query(*p3),
-                                                    board.query(*p4),
-                                                    board.query(*p5),
-                                                    board.query(*p6),
-                                                    board.query(*p7),
-                                                    board.query(*p8),
-                                                    board.query(*p9),
-                                                ]
-                                            )
-                                            if not duplicate(word) and is_word(word):
-                                                words.append(((x, y), word))
-
-    # Sort result
-    return sorted(words, key=lambda val: len(val[1]), reverse=True)
-
-
-def print_results(possibilities: list[tuple[int, int], str], limit: int = 1000) -> str:
-    res = ""
-    for pos, possibility in enumerate(possibilities):
-        current = f"{possibility[0][0]+1}, {possibility[0][1]+1} - {possibility[1]}\n"
-        res += current
-        if pos == limit:
-            return res
-
-    return res
+    cdef int n = len(board.letters)
+    if n > MAX_CELLS:
+        return pure_wordhunt._search_cells(board, cells)
+
+    cdef const unsigned int[::1] nodes = load_trie()
+    cdef int neighbours[MAX_CELLS * MAX_NEIGHBOURS]
+    cdef unsigned int letter_bits[MAX_CELLS]
+    cdef char letters[MAX_CELLS]
+    cdef char word[MAX_CELLS]
+    cdef Search s
+    cdef int cell, i
+    cdef unsigned int mask, bit
+    cdef dict found = {}
+
+    for cell in range(n):
+        row = board.neighbours[cell]
+        for i in range(MAX_NEIGHBOURS):
+            neighbours[cell * MAX_NEIGHBOURS + i] = row[i][0] if i < len(row) else -1
+
+        # Letters outside a-z have no bit, so they're never read from `letters`
+        letter_bits[cell] = board.letter_bits[cell]
+        letters[cell] = ord(board.letters[cell]) if letter_bits[cell] else 0
+
+    s.nodes = &nodes[0]
+    s.neighbours = neighbours
+    s.letter_bits = letter_bits
+    s.letters = letters
+    s.word = word
+    s.min_len = board.min_len
+    s.max_len = min(board.max_len, n)
+
+    if s.max_len < 2:
+        return found
+
+    for cell in cells:
+        mask = s.nodes[0]
+        bit = letter_bits[cell]
+        if not mask & bit:
+            continue
+
+        word[0] = letters[cell]
+        _search(
+            &s, cell, s.nodes[1] + __builtin_popcount(mask & (bit - 1)), 1,
+            1ULL << cell, cell, found,
+        )
+
+    return found
+
+
+class Board(pure_wordhunt.Board):
+    def search_cells(self, cells) -> dict:
+        return _search_cells(self, cells)
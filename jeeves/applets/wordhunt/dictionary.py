@@ -1,9 +1,85 @@
+"""
+Loads the WordHunt dictionary. `dictionary.txt` is the source of truth, compiled
+into `dictionary.trie` which is memory-mapped so workers share one copy of it.
+
+The Docker build compiles the trie ahead of time with `compile_trie`. It's also
+rebuilt automatically whenever it's missing or `dictionary.txt` changes.
+"""
+import hashlib
+import mmap
 import os
+import sys
+from functools import cache
+
+from jeeves.applets.wordhunt.trie import build_trie, Nodes
 
 
 current_dir = os.path.dirname(os.path.realpath(__file__))
 
+DICTIONARY_PATH = os.path.join(current_dir, "dictionary.txt")
+TRIE_PATH = os.path.join(current_dir, "dictionary.trie")
+
+# Header is the magic bytes (format version and byte order) then the source hash
+TRIE_MAGIC = b"WHTRIE1" + sys.byteorder[0].encode()
+HEADER_SIZE = len(TRIE_MAGIC) + hashlib.sha256().digest_size
+
 
 def load_dict():
-    with open(os.path.join(current_dir, "dictionary.txt")) as f:
+    with open(DICTIONARY_PATH) as f:
         return {word.lower() for word in f.read().splitlines()}
+
+
+def dictionary_hash() -> bytes:
+    """
+    SHA-256 of `dictionary.txt`, stored in the compiled trie to detect changes.
+    """
+    with open(DICTIONARY_PATH, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def compile_trie(path: str = TRIE_PATH) -> None:
+    """
+    Compiles `dictionary.txt` into a trie file. Written to a temporary file first
+    so workers building at the same time never see a partial file.
+    """
+    nodes = build_trie(list(load_dict()))
+    temp_path = f"{path}.{os.getpid()}.tmp"
+
+    with open(temp_path, "wb") as f:
+        f.write(TRIE_MAGIC)
+        f.write(dictionary_hash())
+        nodes.tofile(f)
+
+    os.replace(temp_path, path)
+
+
+def _trie_is_current(path: str = TRIE_PATH) -> bool:
+    """
+    Checks if the compiled trie exists and was built from the current dictionary.
+    """
+    if not os.path.exists(path):
+        return False
+
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+
+    return header == TRIE_MAGIC + dictionary_hash()
+
+
+@cache
+def load_trie() -> Nodes:
+    """
+    Memory-maps the compiled trie, compiling it first if it's missing or stale.
+    Kept for the life of the process.
+    """
+    if not _trie_is_current():
+        try:
+            compile_trie()
+        except OSError:
+            # Read-only filesystem, keep this process's trie in memory instead
+            return build_trie(list(load_dict()))
+
+    with open(TRIE_PATH, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return memoryview(mapped)[HEADER_SIZE:].cast("I")
@@ -1,29 +1,78 @@
 """Backend for generating solutions to a WordHunt board."""
-from jeeves.applets.wordhunt.dictionary import load_dict
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, lru_cache, partial
+from itertools import islice
+from typing import Iterable, Iterator
 
+from jeeves.applets.wordhunt.dictionary import load_trie
+from jeeves.applets.wordhunt import trie
 
-# Load the dictionary
-dictionary: set[str] = load_dict()
+
+# Shortest word searched for by default
+MIN_WORD_LENGTH = 3
+
+# Boards with at least this many cells are solved across processes by default,
+# on machines with more than one CPU. None solves every board serially unless asked,
+# as in `benchmarks/wordhunt.py` the pool was slower than a serial solve on every
+# board size measured, up to 16x16. Set it from that benchmark's results instead.
+PARALLEL_MIN_CELLS: int | None = None
+
+# Number of solved boards kept, by letters, dimensions and word lengths
+SOLVE_CACHE_SIZE = 256
+
+# Neighbour offsets, clockwise from directly above, the order `_circle_around` uses
+DIRECTIONS = ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1))
 
 
 def is_word(word: str) -> bool:
     """
     Checks if a word is a valid dictionary word.
     """
-    return word in dictionary
+    return trie.contains(load_trie(), word)
 
 
 class Board:
-    def __init__(self, board: list[list[str]]):
+    def __init__(
+        self,
+        board: list[list[str]],
+        min_len: int = MIN_WORD_LENGTH,
+        max_len: int | None = None,
+    ):
+        """
+        `max_len` of None searches for words as long as the board allows.
+        """
+        if min_len < 1 or (max_len is not None and max_len < min_len):
+            raise ValueError(
+                "Word lengths must be at least 1, and the maximum can't be smaller "
+                "than the minimum."
+            )
+
         self.board = board
         self.height = len(board)
         self.width = len(board[0])
         self.x_top = self.width - 1
         self.y_top = self.height - 1
+        self.min_len = min_len
+        self.max_len = max_len or self.width * self.height
         self.results = []
 
+        # Cells are indexed left to right, top to bottom, and visited cells are
+        # tracked as bits of an integer during the search
+        self.letters = [letter for row in board for letter in row]
+        self.letter_bits = [trie.letter_bit(letter) for letter in self.letters]
+        self.neighbours = _neighbour_table(self.width, self.height)
+
     @classmethod
-    def from_letters(cls, letters: str, width: int, height: int) -> "Board":
+    def from_letters(
+        cls,
+        letters: str,
+        width: int,
+        height: int,
+        min_len: int = MIN_WORD_LENGTH,
+        max_len: int | None = None,
+    ) -> "Board":
         """
         Gathers letters from user input and returns a two-dimensional array.
         """
@@ -40,7 +89,7 @@ class Board:
             board.append(letters[counter : counter + width])
             counter += width
 
-        return cls(board)
+        return cls(board, min_len=min_len, max_len=max_len)
 
     def query(self, x: int, y: int):
         """
@@ -49,20 +98,65 @@ class Board:
         """
         return self.board[y][x]
 
-    def solve(self) -> list[tuple[int, int], str]:
-        self.results = all_possibilities(self)
+    def search_cells(self, cells: Iterable[int]) -> dict[str, int]:
+        """
+        Words found from the given starting cells, see `_search_cells`. Compiled
+        backends override this with a faster search.
+        """
+        return _search_cells(self, cells)
+
+    def solve(self, parallel: bool | None = None) -> list[tuple[int, int], str]:
+        """
+        `parallel` splits the starting cells across processes. None decides by
+        board size and CPUs, see `PARALLEL_MIN_CELLS`.
+        """
+        self.results = trie_possibilities(self, parallel=parallel)
         return self.results
 
-    def print_results(self, limit: int = 1000):
-        if not self.results:
-            self.solve()
+    def iter_results(
+        self, limit: int = 1000, parallel: bool | None = None
+    ) -> Iterator[tuple[tuple[int, int], str]]:
+        """
+        Streams the `limit` longest words, in the same order as `solve`. Keeps only
+        the top words in a heap instead of sorting every word found.
+        """
+        if self.results:
+            yield from self.results[:limit]
+            return
 
-        return print_results(self.results, limit=limit)
+        found = find_words(self, parallel=parallel)
+        yield from heapq.nlargest(
+            limit,
+            ((coordinates, word) for word, coordinates in found.items()),
+            key=lambda val: len(val[1]),
+        )
+
+    def print_results(self, limit: int = 1000):
+        return print_results(self.iter_results(limit), limit=limit)
 
     def __str__(self):
         return "\n".join([str(row) for row in self.board])
 
 
+@cache
+def _neighbour_table(width: int, height: int) -> tuple[tuple[tuple[int, int], ...], ...]:
+    """
+    For each cell index, the (index, bit) of every neighbouring cell on the board.
+    Shared by all boards with the same dimensions.
+    """
+    table = []
+    for y in range(height):
+        for x in range(width):
+            neighbours = []
+            for dx, dy in DIRECTIONS:
+                if 0 <= x + dx < width and 0 <= y + dy < height:
+                    index = (y + dy) * width + x + dx
+                    neighbours.append((index, 1 << index))
+            table.append(tuple(neighbours))
+
+    return tuple(table)
+
+
 def _circle_around(coordinates: tuple[int, int], board: Board) -> list[tuple[int, int]]:
     """
     Returns all coordinate possibilities of circling around a letter by coordinate.
@@ -96,11 +190,171 @@ def _circle_around(coordinates: tuple[int, int], board: Board) -> list[tuple[int
     return possibilities
 
 
+def _search_cells(board: Board, cells: Iterable[int]) -> dict[str, int]:
+    """
+    Finds words between the board's `min_len` and `max_len` starting from the given
+    cells, with a depth first search that drops a path as soon as its letters stop
+    being a prefix of any dictionary word. Maps each word to the first cell it was
+    found from, in the order they were found.
+    """
+    nodes = load_trie()
+    min_len, max_len = board.min_len, board.max_len
+    letters, letter_bits, neighbours = board.letters, board.letter_bits, board.neighbours
+    found: dict[str, int] = {}
+
+    def search(cell: int, node: int, word: str, visited: int, start: int) -> None:
+        for neighbour, neighbour_bit in neighbours[cell]:
+            if visited & neighbour_bit:
+                continue
+
+            # Inlined `trie.child`, this is the hot loop
+            mask = nodes[2 * node]
+            bit = letter_bits[neighbour]
+            if not mask & bit:
+                continue
+            next_node = nodes[2 * node + 1] + (mask & (bit - 1)).bit_count()
+
+            next_word = word + letters[neighbour]
+            if (
+                len(next_word) >= min_len
+                and nodes[2 * next_node] & trie.TERMINAL
+                and next_word not in found
+            ):
+                found[next_word] = start
+
+            if len(next_word) < max_len:
+                search(neighbour, next_node, next_word, visited | neighbour_bit, start)
+
+    for cell in cells:
+        node = trie.child(nodes, trie.ROOT, letter_bits[cell])
+        if node != -1 and max_len > 1:
+            search(cell, node, letters[cell], 1 << cell, cell)
+
+    return found
+
+
+def _search_cell(board: Board, cell: int) -> dict[str, int]:
+    """
+    Words found starting from a single cell. Runs in the process pool.
+    """
+    return board.search_cells((cell,))
+
+
+@cache
+def _process_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for parallel solves, started on first use and kept for the
+    process. The trie is loaded first so forked workers inherit its mapping.
+    """
+    load_trie()
+    return ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
+def find_words(board: Board, parallel: bool | None = None) -> dict[str, tuple[int, int]]:
+    """
+    All words on the board, mapped to the first cell each was found from, in the
+    order they were found. `parallel` searches each starting cell in the process
+    pool, and defaults to doing so for boards of at least `PARALLEL_MIN_CELLS` when
+    there's more than one CPU.
+    """
+    cells = range(len(board.letters))
+    if parallel is None:
+        parallel = (
+            PARALLEL_MIN_CELLS is not None
+            and len(cells) >= PARALLEL_MIN_CELLS
+            and (os.cpu_count() or 1) > 1
+        )
+
+    if not parallel:
+        found = board.search_cells(cells)
+    else:
+        # Results come back in cell order, so keeping each word's first
+        # occurrence gives the same words, cells and order as a serial search
+        found = {}
+        chunksize = max(1, len(cells) // ((os.cpu_count() or 1) * 4))
+        for words in _process_pool().map(
+            partial(_search_cell, board), cells, chunksize=chunksize
+        ):
+            for word, cell in words.items():
+                found.setdefault(word, cell)
+
+    return {word: (cell % board.width, cell // board.width) for word, cell in found.items()}
+
+
+def trie_possibilities(
+    board: Board, parallel: bool | None = None
+) -> list[tuple[tuple[int, int], str]]:
+    """
+    All words found by `find_words`, longest first. With lengths of 3 to 9 the
+    results match `all_possibilities`, in the same order.
+    """
+    # Ties keep the order they were found in
+    return sorted(
+        [
+            (coordinates, word)
+            for word, coordinates in find_words(board, parallel=parallel).items()
+        ],
+        key=lambda val: len(val[1]),
+        reverse=True,
+    )
+
+
+@lru_cache(maxsize=SOLVE_CACHE_SIZE)
+def _solve_cached(
+    board_type: type[Board],
+    letters: str,
+    width: int,
+    height: int,
+    min_len: int,
+    max_len: int,
+) -> tuple[tuple[tuple[int, int], str], ...]:
+    """
+    Solved board by its normalized letters and dimensions. A tuple so cached
+    results can't be changed by callers.
+    """
+    board = board_type.from_letters(letters, width, height, min_len, max_len)
+    return tuple(trie_possibilities(board))
+
+
+def solve_many(boards: Iterable[Board]) -> list[list[tuple[tuple[int, int], str]]]:
+    """
+    Solves each board, answering boards seen recently from the cache. All boards
+    share the dictionary trie and, per size, the neighbour table. Each board's
+    `results` are set as well.
+    """
+    solved = []
+    for board in boards:
+        board.results = list(
+            _solve_cached(
+                type(board),
+                "".join(board.letters),
+                board.width,
+                board.height,
+                board.min_len,
+                board.max_len,
+            )
+        )
+        solved.append(board.results)
+
+    return solved
+
+
+def solve_cache_info():
+    """
+    Hits, misses and size of the solved board cache.
+    """
+    return _solve_cached.cache_info()
+
+
 def all_possibilities(board: Board):
-    words: list[tuple[tuple[int, int], str]] = []
+    """
+    Reference solver, checking every path of 3 to 9 letters against the dictionary.
+    Much slower than `trie_possibilities`, kept to validate it.
+    """
+    words: dict[str, tuple[int, int]] = {}  # first coordinate of each word
 
     def duplicate(word) -> bool:
-        return word in [_[1] for _ in words]
+        return word in words
 
     for y, row in enumerate(board.board):
         for x, char in enumerate(row):
@@ -110,7 +364,7 @@ def all_possibilities(board: Board):
                         continue
                     word = "".join([char, board.query(*p2), board.query(*p3)])
                     if not duplicate(word) and is_word(word):
-                        words.append(((x, y), word))
+                        words[word] = (x, y)
                     for p4 in _circle_around(p3, board):
                         if p4 in [(x, y), p2, p3]:
                             continue
@@ -118,7 +372,7 @@ def all_possibilities(board: Board):
                             [char, board.query(*p2), board.query(*p3), board.query(*p4)]
                         )
                         if not duplicate(word) and is_word(word):
-                            words.append(((x, y), word))
+                            words[word] = (x, y)
                         for p5 in _circle_around(p4, board):
                             if p5 in [(x, y), p2, p3, p4]:
                                 continue
@@ -132,7 +386,7 @@ def all_possibilities(board: Board):
                                 ]
                             )
                             if not duplicate(word) and is_word(word):
-                                words.append(((x, y), word))
+                                words[word] = (x, y)
                             for p6 in _circle_around(p5, board):
                                 if p6 in [(x, y), p2, p3, p4, p5]:
                                     continue
@@ -147,7 +401,7 @@ def all_possibilities(board: Board):
                                     ]
                                 )
                                 if not duplicate(word) and is_word(word):
-                                    words.append(((x, y), word))
+                                    words[word] = (x, y)
                                 for p7 in _circle_around(p6, board):
                                     if p7 in [(x, y), p2, p3, p4, p5, p6]:
                                         continue
@@ -163,7 +417,7 @@ def all_possibilities(board: Board):
                                         ]
                                     )
                                     if not duplicate(word) and is_word(word):
-                                        words.append(((x, y), word))
+                                        words[word] = (x, y)
                                     for p8 in _circle_around(p7, board):
                                         if p8 in [(x, y), p2, p3, p4, p5, p6, p7]:
                                             continue
@@ -180,7 +434,7 @@ def all_possibilities(board: Board):
                                             ]
                                         )
                                         if not duplicate(word) and is_word(word):
-                                            words.append(((x, y), word))
+                                            words[word] = (x, y)
                                         for p9 in _circle_around(p8, board):
                                             if p9 in [
                                                 (x, y),
@@ -207,18 +461,20 @@ def all_possibilities(board: Board):
                                                 ]
                                             )
                                             if not duplicate(word) and is_word(word):
-                                                words.append(((x, y), word))
+                                                words[word] = (x, y)
 
     # Sort result
-    return sorted(words, key=lambda val: len(val[1]), reverse=True)
-
+    return sorted(
+        [(coordinates, word) for word, coordinates in words.items()],
+        key=lambda val: len(val[1]),
+        reverse=True,
+    )
 
-def print_results(possibilities: list[tuple[int, int], str], limit: int = 1000) -> str:
-    res = ""
-    for pos, possibility in enumerate(possibilities):
-        current = f"{possibility[0][0]+1}, {possibility[0][1]+1} - {possibility[1]}\n"
-        res += current
-        if pos == limit:
-            return res
 
-    return res
+def print_results(
+    possibilities: Iterable[tuple[tuple[int, int], str]], limit: int = 1000
+) -> str:
+    return "".join(
+        f"{coordinates[0]+1}, {coordinates[1]+1} - {word}\n"
+        for coordinates, word in islice(possibilities, limit)
+    )
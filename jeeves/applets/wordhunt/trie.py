@@ -0,0 +1,93 @@
+"""
+Prefix trie of the WordHunt dictionary, stored as a flat array of integers.
+
+Each node takes two slots. The first is a bitmask of the letters leading out of
+the node, with `TERMINAL` set if the node completes a word. The second is the
+index of the node's first child. Children are stored contiguously in alphabetical
+order, so the child for a letter is found by counting the set bits below it.
+"""
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+
+TERMINAL = 1 << 26
+ROOT = 0
+
+Nodes = array | memoryview  # built in memory, or memory-mapped from disk
+
+
+def build_trie(words: list[str]) -> array:
+    """
+    Compiles lowercase a-z words into a flat trie. Nodes are laid out breadth-first
+    so each node's children sit next to each other.
+    """
+    words = sorted(set(words))
+    nodes = array("I", [0, 0])
+    queue = deque([(ROOT, 0, len(words), 0)])  # node, first word, last word, depth
+
+    while queue:
+        node, low, high, depth = queue.popleft()
+        mask = 0
+
+        # Sorted, so a word ending at this node comes before its extensions
+        if low < high and len(words[low]) == depth:
+            mask |= TERMINAL
+            low += 1
+
+        nodes[2 * node + 1] = len(nodes) // 2
+        while low < high:
+            letter = words[low][depth]
+            end = bisect_left(words, words[low][:depth] + chr(ord(letter) + 1), low, high)
+            mask |= 1 << (ord(letter) - 97)
+
+            child = len(nodes) // 2
+            nodes.extend((0, 0))
+            queue.append((child, low, end, depth + 1))
+            low = end
+
+        nodes[2 * node] = mask
+
+    return nodes
+
+
+def letter_bit(letter: str) -> int:
+    """
+    Bit of a letter in a node's mask, or 0 if the letter can't appear in the trie.
+    """
+    if "a" <= letter <= "z":
+        return 1 << (ord(letter) - 97)
+    return 0
+
+
+def child(nodes: Nodes, node: int, bit: int) -> int:
+    """
+    Index of the child reached by following a letter bit, or -1 if there isn't one.
+    """
+    mask = nodes[2 * node]
+    if not mask & bit:
+        return -1
+    return nodes[2 * node + 1] + (mask & (bit - 1)).bit_count()
+
+
+def find(nodes: Nodes, word: str) -> int:
+    """
+    Node reached by walking the whole word, or -1 if it isn't a prefix in the trie.
+    """
+    node = ROOT
+    for letter in word:
+        bit = letter_bit(letter)
+        if not bit:
+            return -1
+        node = child(nodes, node, bit)
+        if node == -1:
+            return -1
+    return node
+
+
+def contains(nodes: Nodes, word: str) -> bool:
+    """
+    Checks if the trie contains a complete word.
+    """
+    node = find(nodes, word)
+    return node != -1 and bool(nodes[2 * node] & TERMINAL)
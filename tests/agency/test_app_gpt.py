@@ -1,10 +1,16 @@
 "Test the GPT app."
+import datetime as dt
+import pytz
+
 from jeeves.applets.gpt import handler
 from api.voice_inbound import _process_speech
 from api.voice_outbound import process_user_speech
 from jeeves.agency.make_calls.database import Call
 from jeeves.agency.tool_auth import NO_AUTH_TOOLS, build_tools
 from jeeves.agency.logs_callback import extract_log_items
+from jeeves.agency.prompts import build_prompt_values
+from jeeves.agency.chat_history import ChatHistory
+from jeeves.agency.chat_history.models import Message
 
 from jeeves.permissions import User
 from keys import KEYS
@@ -81,6 +87,29 @@ def test_processing_speech_outbound(outbound_call_key, mocker):
     assert "upcdn" in xml
 
 
+def test_prompts_use_loaded_history(mocker, temporary_user):
+    """Building prompts from an agent context's history doesn't read the database."""
+    user = User.from_phone(temporary_user["Phone"])
+    chat_history = ChatHistory(
+        messages=[
+            Message(
+                datetime=dt.datetime.now(pytz.timezone(user.timezone)),
+                inbound_phone=user.phone,
+                user_input="Remember the word pineapple.",
+                agent_response="Noted, sir."
+            )
+        ]
+    )
+    load_history = mocker.patch(
+        "jeeves.agency.chat_history.database.ChatHistory.recent"
+    )
+
+    prompt_values = build_prompt_values(user, chat_history=chat_history)
+
+    load_history.assert_not_called()
+    assert "pineapple" in prompt_values["chat_history"]
+
+
 def test_serper_wrapper():
     """Test the serper wrapper."""
     serper_tool = NO_AUTH_TOOLS[0]
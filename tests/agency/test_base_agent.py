@@ -3,7 +3,10 @@ import pytest
 from fastapi.testclient import TestClient
 
 import api
-from jeeves.agency import generate_base_agent_response
+from jeeves.agency import generate_base_agent_response, create_agent_executor
+from jeeves.agency.prompts import agent_prompt_templates, build_base_prompt_values
+from jeeves.agency.prompts.registry import ParsedTemplate
+from jeeves.agency.tool_auth import NO_AUTH_TOOLS
 
 
 @pytest.fixture(scope="module")
@@ -26,6 +29,25 @@ def test_search(mocker, callback_uid):
     assert generate_base_agent_response("weather in washington dc")
  
 
+def test_shared_agent():
+    """Executors for the same toolset share one agent."""
+    first = create_agent_executor(NO_AUTH_TOOLS, callback_handlers=[], base=True)
+    second = create_agent_executor(NO_AUTH_TOOLS, callback_handlers=[], base=True)
+
+    assert first is not second
+    assert first.agent is second.agent
+    assert {"my_name", "current_datetime", "input"} <= set(first.agent.input_keys)
+
+
+def test_base_prompt_values():
+    """The base agent's values fill every per-run variable in its prompt."""
+    templates = agent_prompt_templates(base=True)
+    values = build_base_prompt_values()
+
+    assert ParsedTemplate(templates.prefix).variables <= set(values)
+    assert "a generic user" in templates.prefix.format(**values)
+ 
+
 # ---- Test via client ----
 
 def test_testing_endpoint(test_client):
@@ -0,0 +1,28 @@
+"""Test the BM25 pre-filter."""
+from jeeves.agency.bm25 import BM25Index, terms
+
+
+CHUNKS = [
+    "We talked about the weather and the weekend plans for a while.",
+    "The Aurora launch moved to March because the battery shipment was late.",
+    "Then everyone discussed lunch options near the office.",
+    "Battery prices came up briefly before the meeting ended.",
+]
+
+
+def test_terms_drop_stopwords():
+    assert terms("What is the Aurora launch date?") == ["aurora", "launch", "date"]
+
+
+def test_best_match_first():
+    top = BM25Index(CHUNKS).top("When is the Aurora launch?", k=2)
+    assert top[0] == 1
+    assert len(top) == 2
+
+
+def test_terms_any_script():
+    assert terms("Où est le Café?") == ["où", "est", "le", "café"]
+
+
+def test_no_overlap_returns_nothing():
+    assert BM25Index(CHUNKS).top("Quarterly revenue", k=3) == []
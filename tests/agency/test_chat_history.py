@@ -0,0 +1,278 @@
+"""Test loading and saving chat history."""
+import pytest
+from pydantic import ValidationError
+
+import datetime as dt
+import pytz
+import random
+
+from config import CONFIG
+from jeeves.agency.chat_history import ChatHistory
+from jeeves.agency.chat_history.cache import HistoryCache
+from jeeves.agency.chat_history.database import (
+    CHATS_COLL, VERSIONS_COLL, HISTORY_CACHE, ensure_indexes
+)
+from jeeves.agency.chat_history.filter import count_message_tokens
+from jeeves.agency.chat_history.models import Message, Summary
+from jeeves.agency.chat_history import summary as summary_module
+from jeeves.agency.chat_history.summary import SUMMARIES_COLL, update_summary
+
+
+tz = pytz.timezone(CONFIG.General.default_timezone)
+
+
+@pytest.fixture(scope="module")
+def temporary_history_phone() -> str:
+    """Phone number with ten saved messages, one a day. Deleted afterwards."""
+    phone = "1" + "".join(random.choices("0123456789", k=10))
+    chat_history = ChatHistory(messages=[])
+    for day in range(1, 11):
+        chat_history.add_message(
+            Message(
+                datetime=dt.datetime(2021, 1, day, 12, 0, 0, tzinfo=tz),
+                inbound_phone=phone,
+                user_input=f"Message {day}",
+                agent_response=f"Response {day}"
+            )
+        )
+
+    yield phone
+
+    CHATS_COLL.delete_many({"inbound_phone": phone})
+    VERSIONS_COLL.delete_one({"_id": phone})
+    SUMMARIES_COLL.delete_one({"_id": phone})
+
+
+def test_ensure_indexes():
+    ensure_indexes()
+    assert any(
+        list(index["key"].keys()) == ["inbound_phone", "datetime"]
+        for index in CHATS_COLL.list_indexes()
+    )
+
+
+def test_full_history(temporary_history_phone):
+    messages = ChatHistory.from_inbound_phone(temporary_history_phone).messages
+
+    assert len(messages) == 10
+    assert messages == sorted(messages, key=lambda message: message.datetime)
+
+
+def test_limited_history(temporary_history_phone):
+    """The newest messages are loaded, oldest first."""
+    messages = ChatHistory.from_inbound_phone(temporary_history_phone, limit=3).messages
+
+    assert [message.user_input for message in messages] == [
+        "Message 8", "Message 9", "Message 10"
+    ]
+
+
+def test_history_after(temporary_history_phone):
+    messages = ChatHistory.from_inbound_phone(
+        temporary_history_phone, after=dt.datetime(2021, 1, 6, 12, 0, 0, tzinfo=tz)
+    ).messages
+
+    assert [message.user_input for message in messages] == [
+        "Message 7", "Message 8", "Message 9", "Message 10"
+    ]
+
+
+def test_format_messages():
+    """Braces are escaped for the prompt template without changing the messages."""
+    message = Message(
+        datetime=dt.datetime(2021, 1, 1, 12, 0, 0, tzinfo=tz),
+        inbound_phone="12223334455",
+        user_input="What's in {braces}?",
+        agent_response="Nothing, sir."
+    )
+    chat_history = ChatHistory(messages=[message, message])
+
+    formatted = chat_history.format_messages()
+
+    assert formatted == (
+        "Me: What's in ((braces))?\nJeeves: Nothing, sir.\n"
+        "Me: What's in ((braces))?\nJeeves: Nothing, sir."
+    )
+    assert message.user_input == "What's in {braces}?"
+
+
+def test_format_messages_with_summary(temporary_history_phone):
+    """Only messages newer than the summary are formatted, after it."""
+    chat_history = ChatHistory.from_inbound_phone(temporary_history_phone)
+    summary = Summary(
+        inbound_phone=temporary_history_phone,
+        content="We talked about {nothing}.",
+        through=dt.datetime(2021, 1, 8, 12, 0, 0, tzinfo=tz)
+    )
+
+    formatted = chat_history.format_messages(summary=summary)
+
+    assert formatted.startswith(
+        "Summary of our earlier conversation: We talked about ((nothing))."
+    )
+    assert "Message 8" not in formatted
+    assert "Message 9" in formatted and "Message 10" in formatted
+
+
+def test_message_transcript_follows_copies():
+    """Messages can't be changed in place, and copies render their own line."""
+    message = Message(
+        datetime=dt.datetime(2021, 1, 1, 12, 0, 0, tzinfo=tz),
+        inbound_phone="10000000000",
+        user_input="Hi.",
+        agent_response="Hello."
+    )
+
+    with pytest.raises(ValidationError):
+        message.user_input = "Changed."
+
+    copy = message.model_copy(update={"user_input": "What's {new}?"})
+    assert copy.transcript == "Me: What's ((new))?\nJeeves: Hello."
+    assert message.transcript == "Me: Hi.\nJeeves: Hello."
+
+
+def test_stored_token_counts(temporary_history_phone):
+    messages = ChatHistory.from_inbound_phone(temporary_history_phone).messages
+
+    for message in messages:
+        assert message.token_count == count_message_tokens(
+            message.model_copy(update={"token_count": None})
+        )
+
+
+def test_token_count_backfill(temporary_history_phone):
+    """Messages saved without a token count get one the next time they're loaded."""
+    CHATS_COLL.update_many(
+        {"inbound_phone": temporary_history_phone}, {"$unset": {"token_count": ""}}
+    )
+
+    ChatHistory.from_inbound_phone(temporary_history_phone)
+
+    assert not CHATS_COLL.count_documents(
+        {"inbound_phone": temporary_history_phone, "token_count": None}
+    )
+
+
+# ---- Cache ----
+
+@pytest.fixture
+def history_cache(monkeypatch):
+    """Enable the history cache, emptied before and after the test."""
+    monkeypatch.setattr(CONFIG.ChatHistory, "cache", True)
+    HISTORY_CACHE.clear()
+    yield HISTORY_CACHE
+    HISTORY_CACHE.clear()
+
+
+def test_history_cache_hit(history_cache, temporary_history_phone):
+    first = ChatHistory.recent(temporary_history_phone)
+    hits = history_cache.hits
+
+    second = ChatHistory.recent(temporary_history_phone)
+
+    assert history_cache.hits == hits + 1
+    assert second.messages == first.messages
+    assert second.messages is not first.messages
+
+
+def test_history_cache_write_through(history_cache, temporary_history_phone):
+    chat_history = ChatHistory.recent(temporary_history_phone)
+    chat_history.add_message(
+        Message(
+            datetime=dt.datetime(2021, 1, 11, 12, 0, 0, tzinfo=tz),
+            inbound_phone=temporary_history_phone,
+            user_input="Message 11",
+            agent_response="Response 11"
+        )
+    )
+    hits = history_cache.hits
+
+    messages = ChatHistory.recent(temporary_history_phone).messages
+    CHATS_COLL.delete_one(
+        {"inbound_phone": temporary_history_phone, "user_input": "Message 11"}
+    )
+
+    assert history_cache.hits == hits + 1
+    assert messages[-1].user_input == "Message 11"
+
+
+def test_history_cache_invalidation(history_cache, temporary_history_phone):
+    """A message saved by another worker makes the cached history stale."""
+    ChatHistory.recent(temporary_history_phone)
+    VERSIONS_COLL.update_one(
+        {"_id": temporary_history_phone}, {"$inc": {"version": 1}}, upsert=True
+    )
+    stale = history_cache.stale
+
+    ChatHistory.recent(temporary_history_phone)
+
+    assert history_cache.stale == stale + 1
+
+
+def test_history_cache_ttl():
+    cache = HistoryCache(maxsize=2, ttl=0, window=5)
+    cache.put("12223334455", [], version=1)
+
+    assert cache.get("12223334455", version=1) is None
+    assert cache.stats()["stale"] == 1
+
+
+# ---- Summary ----
+
+class RecordingLLM:
+    """The summary model, recording its prompts."""
+    def __init__(self, llm):
+        self.llm = llm
+        self.prompts = []
+
+    def predict(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return self.llm.predict(prompt)
+
+
+def test_update_summary(monkeypatch, temporary_history_phone):
+    """All but the latest messages are folded into a new summary."""
+    monkeypatch.setattr(CONFIG.ChatHistory, "recent_turns", 4)
+
+    summary = update_summary(temporary_history_phone)
+
+    assert summary.content
+    assert summary.through == dt.datetime(2021, 1, 6, 12, 0, 0, tzinfo=tz)
+    assert update_summary(temporary_history_phone) == summary
+
+
+def test_first_summary_window(monkeypatch, temporary_history_phone):
+    """A first summary only reads the newest messages, older ones count as covered."""
+    monkeypatch.setattr(CONFIG.ChatHistory, "recent_turns", 4)
+    monkeypatch.setattr(summary_module, "FIRST_SUMMARY_MESSAGES", 6)
+    SUMMARIES_COLL.delete_one({"_id": temporary_history_phone})
+
+    recording_llm = RecordingLLM(summary_module.llm)
+    monkeypatch.setattr(summary_module, "llm", recording_llm)
+
+    summary = update_summary(temporary_history_phone)
+
+    assert len(recording_llm.prompts) == 1
+    assert "Message 5" in recording_llm.prompts[0]
+    assert "Message 6" in recording_llm.prompts[0]
+    assert "Message 4" not in recording_llm.prompts[0]
+    assert summary.through == dt.datetime(2021, 1, 6, 12, 0, 0, tzinfo=tz)
+    assert update_summary(temporary_history_phone) == summary
+
+
+def test_update_summary_in_batches(monkeypatch, temporary_history_phone):
+    """Messages over the prompt budget are folded in later batches, not dropped."""
+    monkeypatch.setattr(CONFIG.ChatHistory, "recent_turns", 4)
+    monkeypatch.setattr(summary_module, "SUMMARY_INPUT_TOKENS", 1)
+    SUMMARIES_COLL.delete_one({"_id": temporary_history_phone})
+
+    recording_llm = RecordingLLM(summary_module.llm)
+    monkeypatch.setattr(summary_module, "llm", recording_llm)
+
+    summary = update_summary(temporary_history_phone)
+
+    assert len(recording_llm.prompts) == 6
+    assert all(
+        f"Message {day}" in recording_llm.prompts[day - 1] for day in range(1, 7)
+    )
+    assert summary.through == dt.datetime(2021, 1, 6, 12, 0, 0, tzinfo=tz)
@@ -0,0 +1,62 @@
+"""Test the embedding cache."""
+import pytest
+
+import random
+import string
+
+from jeeves.agency.embedding_cache import (
+    CachedEmbeddings, EMBEDDINGS_COLL, EMBEDDINGS_TTL, ensure_indexes
+)
+
+
+class CountingEmbeddings:
+    """Deterministic embeddings that count the texts they embed."""
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.embedded += len(texts)
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def cached_embeddings():
+    """Embeddings cached under a model name only this test uses."""
+    model = "test-" + "".join(random.choices(string.ascii_lowercase, k=10))
+    yield CachedEmbeddings(CountingEmbeddings(), model=model)
+    EMBEDDINGS_COLL.delete_many({"model": model})
+
+
+def test_second_embed_is_cached(cached_embeddings):
+    texts = ["The first chunk.", "The second chunk.", "The first chunk."]
+
+    first = cached_embeddings.embed_documents(texts)
+    second = cached_embeddings.embed_documents(texts)
+
+    assert first == second
+    assert cached_embeddings.embeddings.embedded == 2
+    assert cached_embeddings.stats()["hits"] == 3
+    assert cached_embeddings.stats()["misses"] == 2
+
+
+def test_queries_not_stored(cached_embeddings):
+    first = cached_embeddings.embed_query("A one-off question?")
+    second = cached_embeddings.embed_query("A one-off question?")
+
+    assert first == second
+    assert cached_embeddings.embeddings.embedded == 1
+    assert EMBEDDINGS_COLL.count_documents({"model": cached_embeddings.model}) == 0
+
+
+def test_unused_embeddings_expire(cached_embeddings):
+    cached_embeddings.embed_documents(["A chunk."])
+    ensure_indexes()
+
+    assert EMBEDDINGS_COLL.find_one({"model": cached_embeddings.model})["last_used"]
+    assert any(
+        index.get("expireAfterSeconds") == EMBEDDINGS_TTL
+        for index in EMBEDDINGS_COLL.index_information().values()
+    )
@@ -0,0 +1,81 @@
+"""Test web page text extraction."""
+import pytest
+
+from jeeves.agency import tokenizer
+from jeeves.agency.html_text import ENGINES, charset, get_extractor
+
+
+PAGE = b"""
+<html>
+<head><title>Jeeves</title><style>p { color: red; }</style></head>
+<body>
+  <nav><a href="/">Home</a><a href="/about">About</a></nav>
+  <article>
+    <h1>The article</h1>
+    <p>First paragraph &amp; more.</p>
+    <div aria-hidden="true">Hidden text.</div>
+    <script>var ignored = "<p>not text</p>";</script>
+    <p>Second<br>paragraph.</p>
+  </article>
+  <footer>Copyright</footer>
+</body>
+</html>
+"""
+
+
+@pytest.mark.parametrize("engine", ["lxml", "stream"])
+def test_streaming_engines(engine):
+    text = get_extractor(engine)(PAGE)
+    assert text == "Jeeves The article First paragraph & more. Second paragraph."
+
+
+@pytest.mark.parametrize("engine", list(ENGINES))
+def test_page_wrapped_in_form(engine):
+    page = (
+        b'<html><body><form id="form1" method="post"><div><h1>Title</h1>'
+        b"<p>Page content.</p></div></form></body></html>"
+    )
+    assert get_extractor(engine)(page) == "Title Page content."
+
+
+@pytest.mark.parametrize("engine", ["lxml", "stream"])
+def test_unclosed_hidden_paragraph(engine):
+    page = b"<html><body><p hidden>Hidden<p>Visible.<div>More text.</div></body></html>"
+    text = get_extractor(engine)(page)
+    assert "Visible." in text
+    assert "More text." in text
+
+
+@pytest.mark.parametrize("engine", list(ENGINES))
+def test_latin1_without_meta_charset(engine):
+    page = "<html><body><p>Caf\u00e9 cr\u00e8me br\u00fbl\u00e9e.</p></body></html>"
+    expected = "Caf\u00e9 cr\u00e8me br\u00fbl\u00e9e."
+
+    assert get_extractor(engine)(page.encode("latin-1")) == expected
+    assert get_extractor(engine)(page.encode("latin-1"), "iso-8859-1") == expected
+
+
+def test_charset():
+    assert charset("text/html; charset=ISO-8859-1") == "ISO-8859-1"
+    assert charset("text/html") is None
+    assert charset(None) is None
+
+
+def test_soup_engine_keeps_boilerplate():
+    text = get_extractor("soup")(PAGE)
+    assert "The article" in text
+    assert "Copyright" in text
+    assert "not text" not in text
+
+
+@pytest.mark.parametrize("engine", list(ENGINES))
+def test_token_budget(engine):
+    page = b"<html><body>" + b"<p>Some words in a paragraph.</p>" * 5000 + b"</body></html>"
+    text = get_extractor(engine, max_tokens=100)(page)
+    assert tokenizer.count_tokens(text) <= 100
+    assert text.startswith("Some words in a paragraph.")
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        get_extractor("regex")
@@ -0,0 +1,83 @@
+"""Test the on-disk index store."""
+from langchain.embeddings.base import Embeddings
+from langchain.vectorstores import FAISS
+import pytest
+
+import os
+
+from jeeves.agency.index_store import IndexStore
+from jeeves.agency.retrieval import WebsiteAnswerer
+
+
+class LengthEmbeddings(Embeddings):
+    """Deterministic embeddings, no API calls."""
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def store(tmp_path):
+    embeddings = LengthEmbeddings()
+    return IndexStore(
+        str(tmp_path), embeddings, max_bytes=10 * 1024**2, max_age=3600, refresh_after=0
+    )
+
+
+def test_unchanged_source_not_rebuilt(store):
+    builds = []
+
+    def build(text: str) -> FAISS:
+        builds.append(text)
+        return FAISS.from_texts([text], store.embeddings)
+
+    first = store.get_or_build("source", lambda: "Some text.", build)
+    second = store.get_or_build("source", lambda: "Some text.", build)
+    changed = store.get_or_build("source", lambda: "Other text.", build)
+
+    assert builds == ["Some text.", "Other text."]
+    assert second.similarity_search("query", k=1)[0].page_content == "Some text."
+    assert changed.similarity_search("query", k=1)[0].page_content == "Other text."
+    assert first is not second
+
+
+def test_evict_by_size(store):
+    build = lambda text: FAISS.from_texts([text], store.embeddings)
+    store.get_or_build("first", lambda: "First.", build)
+
+    store.max_bytes = 1
+    store.get_or_build("second", lambda: "Second.", build)
+
+    assert not os.path.exists(store.path("first"))
+
+
+def test_evict_abandoned_temp_folders(store):
+    abandoned = os.path.join(store.directory, "abandoned.1.2.tmp")
+    os.makedirs(abandoned)
+    with open(os.path.join(abandoned, "index.faiss"), "wb") as f:
+        f.write(b"0" * 1024)
+    os.utime(abandoned, (0, 0))
+
+    store.evict()
+
+    assert not os.path.exists(abandoned)
+
+
+def test_failed_save_leaves_no_temp_folder(store, monkeypatch):
+    def fail(*args):
+        raise OSError("Another worker saved first.")
+
+    monkeypatch.setattr(os, "replace", fail)
+    build = lambda text: FAISS.from_texts([text], store.embeddings)
+    store.get_or_build("source", lambda: "Some text.", build)
+
+    assert not [name for name in os.listdir(store.directory) if name.endswith(".tmp")]
+
+
+def test_website_source_key():
+    assert (
+        WebsiteAnswerer("HTTPS://Example.com/page/#section").source_key()
+        == WebsiteAnswerer("https://example.com/page").source_key()
+    )
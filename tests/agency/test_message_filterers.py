@@ -132,3 +132,11 @@ def test_token_filterer(temporary_messages):
 
     filtered = TokenCountFilterer(max_tokens=last_three_tokens+1).filter_messages(temporary_messages)
     assert len(filtered) == 3
+
+
+def test_token_filterer_stored_counts(temporary_messages):
+    """Stored token counts are used instead of counting the content again."""
+    messages = [message.model_copy(update={"token_count": 10}) for message in temporary_messages]
+
+    filtered = TokenCountFilterer(max_tokens=25).filter_messages(messages)
+    assert filtered == messages[-2:]
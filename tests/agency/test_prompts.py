@@ -0,0 +1,32 @@
+"""Test the prompt template registry."""
+import os
+
+from jeeves.agency.prompts.registry import ParsedTemplate, PromptRegistry
+
+
+def test_parsed_template():
+    template = ParsedTemplate("Hello, {name}. {{literal}} {agent_scratchpad}")
+
+    assert template.variables == {"name", "agent_scratchpad"}
+
+
+def test_registry_loads_once(tmp_path):
+    (tmp_path / "prefix.txt").write_text("I am {my_name}.")
+    registry = PromptRegistry(str(tmp_path))
+
+    first = registry.get("prefix")
+    (tmp_path / "prefix.txt").write_text("Changed.")
+
+    assert registry.get("prefix") is first
+
+
+def test_registry_hot_reload(tmp_path):
+    path = tmp_path / "prefix.txt"
+    path.write_text("I am {my_name}.")
+    registry = PromptRegistry(str(tmp_path), hot_reload=True)
+    registry.get("prefix")
+
+    path.write_text("Changed.")
+    os.utime(path, (0, 0))
+
+    assert registry.get("prefix").template == "Changed."
@@ -0,0 +1,26 @@
+"""Test the shared tokenizer."""
+from jeeves.agency import tokenizer
+
+
+def test_count_tokens():
+    text = "The quick brown fox jumps over the lazy dog."
+    assert tokenizer.count_tokens(text) == len(tokenizer.encode(text))
+
+
+def test_count_cache():
+    text = "A sentence only this test counts, twice."
+    hits = tokenizer.count_cache_stats()["hits"]
+
+    assert tokenizer.count_tokens(text) == tokenizer.count_tokens(text)
+    assert tokenizer.count_cache_stats()["hits"] == hits + 1
+
+
+def test_count_tokens_batch():
+    texts = ["One.", "Two words.", "A few more words here.", "One."]
+    assert tokenizer.count_tokens_batch(texts) == [
+        len(tokens) for tokens in tokenizer.encode_batch(texts)
+    ]
+
+
+def test_shared_splitter():
+    assert tokenizer.token_splitter(300, 50) is tokenizer.token_splitter(300, 50)
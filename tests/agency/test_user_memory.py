@@ -2,6 +2,7 @@
 from langchain.tools import BaseTool
 
 from jeeves.agency.user_memory import UserMemory, create_user_memory_tools
+from jeeves.agency.user_memory import database
 
 
 def test_adding_to_memory(temporary_user_memory):
@@ -29,3 +30,15 @@ def test_building_user_memory_tools(temporary_user_memory):
 
     assert isinstance(user_memory_tools, list)
     assert all(isinstance(tool, BaseTool) for tool in user_memory_tools)
+
+
+def test_user_memory_tools_load_lazily(mocker, temporary_user_memory):
+    """Entries are only loaded once the agent questions the memory."""
+    load_entries = mocker.spy(database, "_load_entries")
+    store_tool, question_tool = create_user_memory_tools(temporary_user_memory)
+
+    store_tool.run("My favorite color is teal.")
+    load_entries.assert_not_called()
+
+    assert "teal" in question_tool.run("What's my favorite color?").lower()
+    load_entries.assert_called_once()
@@ -0,0 +1,74 @@
+"""Test fetching and caching web pages."""
+import pytest
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import threading
+
+from jeeves.agency.html_text import TextExtractor
+from jeeves.agency.web_fetch import FetchCache, fetch_text, freshness
+
+
+PAGE = b"<html><body><script>ignored()</script><p>Hello there.</p></body></html>"
+
+
+class CountingExtractor(TextExtractor):
+    """Extracts a fixed text, counting the pages it parses."""
+    def __init__(self):
+        super().__init__()
+        self.parsed = 0
+
+    def extract(self, content: bytes, encoding: str | None = None) -> str:
+        self.parsed += 1
+        return "Hello there."
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves `PAGE` with an ETag and no-cache, answering 304 when it matches."""
+    requests: list[int] = []
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            PageHandler.requests.append(304)
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+        PageHandler.requests.append(200)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def page_url():
+    server = HTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    PageHandler.requests = []
+    yield f"http://127.0.0.1:{server.server_port}/page"
+    server.shutdown()
+
+
+def test_freshness():
+    assert freshness({"Cache-Control": "public, max-age=60"}, 900, 3600) == 60
+    assert freshness({"Cache-Control": "max-age=99999"}, 900, 3600) == 3600
+    assert freshness({"Cache-Control": "no-cache"}, 900, 3600) == 0
+    assert freshness({"Cache-Control": "no-store"}, 900, 3600) is None
+    assert freshness({"Expires": "Thu, 01 Jan 1970 00:00:00 GMT"}, 900, 3600) == 0
+    assert freshness({}, 900, 3600) == 900
+
+
+def test_revalidated_page_not_parsed_again(tmp_path, page_url):
+    cache = FetchCache(str(tmp_path), default_ttl=900, max_ttl=3600, max_bytes=1024**2)
+    extractor = CountingExtractor()
+
+    assert fetch_text(page_url, extractor, cache) == "Hello there."
+    assert fetch_text(page_url, extractor, cache) == "Hello there."
+
+    assert PageHandler.requests == [200, 304]
+    assert extractor.parsed == 1
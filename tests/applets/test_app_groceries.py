@@ -117,6 +117,44 @@ def test_pluralization():
     assert utils.pluralize("beans") == "beans"
 
 
+def test_item_index():
+    """The item index agrees with searching the mapping."""
+    mapping = utils.MAPPING("whole foods")
+    index = utils.ITEM_INDEX("whole foods")
+
+    assert index is utils.ITEM_INDEX("Whole Foods")  # built once
+    for item, (category, category_rank, item_rank) in index.items():
+        assert next(cat for cat in mapping if item in mapping[cat]) == category
+        assert list(mapping).index(category) == category_rank
+        assert mapping[category].index(item) == item_rank
+
+
+def test_inflection_cache(tmp_path):
+    hits = utils.inflection_stats()["singular"]["hits"]
+    assert utils.singularize("blueberries") == "blueberry"
+    assert utils.singularize("blueberries") == "blueberry"
+    assert utils.inflection_stats()["singular"]["hits"] >= hits + 1
+
+    path = str(tmp_path / "inflection_cache.json")
+    utils.save_inflection_cache(path)
+    singular = utils.InflectionCache(maxsize=10_000)
+    assert utils.load_caches({"singular": singular}, path, utils.INFLECTION_CACHE_KEY)
+    assert singular.words["blueberries"] == "blueberry"
+
+    # Caches saved for another mapping aren't used
+    assert not utils.load_caches({"singular": singular}, path, "another mapping")
+
+
+def test_inflection_cache_bounded():
+    cache = utils.InflectionCache(maxsize=2)
+    for word in ["apples", "pears", "limes"]:
+        cache.get(word, lambda word: word[:-1])
+
+    assert list(cache.words) == ["pears", "limes"]
+    assert cache.stats()["misses"] == 3
+    assert cache.unsaved == 3
+
+
 def test_help():
     res = groceries.handler(content="", options={"help": "yes"})
 
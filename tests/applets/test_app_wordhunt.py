@@ -8,6 +8,12 @@ import string
 
 # Project
 from jeeves.applets import wordhunt
+from jeeves.applets.wordhunt import pure_wordhunt
+
+
+@pytest.fixture
+def cy_wordhunt():
+    return pytest.importorskip("jeeves.applets.wordhunt.cy_wordhunt")
 
 
 @pytest.fixture
@@ -52,3 +58,127 @@ def test_print_results_no_limit(random_board):
 
 def test_help():
     assert "Solve a" in wordhunt.handler("", {"help": "yes"})
+
+
+def test_trie_matches_reference(random_board):
+    board = wordhunt.wordhunt.Board(random_board.board, min_len=3, max_len=9)
+    assert (
+        wordhunt.wordhunt.trie_possibilities(board)
+        == wordhunt.wordhunt.all_possibilities(board)
+    )
+
+
+def test_word_lengths():
+    board = wordhunt.wordhunt.Board.from_letters(
+        "nahzuxtskdyxpaus", 4, 4, min_len=4, max_len=4
+    )
+    assert {len(word) for _, word in board.solve()} == {4}
+
+
+def test_large_board():
+    letters = "".join(random.choices(string.ascii_lowercase, k=64))
+    results = wordhunt.wordhunt.Board.from_letters(letters, 8, 8).solve()
+    assert all(wordhunt.wordhunt.is_word(word) for _, word in results)
+
+
+def test_bad_word_lengths():
+    res = wordhunt.handler(
+        content="nahzuxtskdyxpaus", options={"min_length": "5", "max_length": "4"}
+    )
+
+    assert "maximum" in res
+
+
+def test_trie_lookup():
+    nodes = wordhunt.dictionary.load_trie()
+
+    assert wordhunt.trie.contains(nodes, "thanx")
+    assert not wordhunt.trie.contains(nodes, "than-x")
+    assert wordhunt.trie.find(nodes, "aardvar") != -1
+    assert not wordhunt.trie.contains(nodes, "aardvar")
+
+
+def test_compiled_trie(tmp_path):
+    path = str(tmp_path / "dictionary.trie")
+    wordhunt.dictionary.compile_trie(path)
+
+    assert wordhunt.dictionary._trie_is_current(path)
+    with open(path, "rb") as f:
+        f.seek(wordhunt.dictionary.HEADER_SIZE)
+        compiled = f.read()
+    nodes = wordhunt.trie.build_trie(list(wordhunt.dictionary.load_dict()))
+    assert compiled == nodes.tobytes()
+
+    assert not wordhunt.dictionary._trie_is_current(str(tmp_path / "missing.trie"))
+
+
+def test_neighbour_table(random_board):
+    for y in range(random_board.height):
+        for x in range(random_board.width):
+            expected = [
+                ny * random_board.width + nx
+                for nx, ny in wordhunt.wordhunt._circle_around((x, y), random_board)
+            ]
+            cell = y * random_board.width + x
+            assert [n for n, _ in random_board.neighbours[cell]] == expected
+
+
+def test_iter_results(random_board):
+    top = list(random_board.iter_results(5))
+    assert top == wordhunt.wordhunt.trie_possibilities(random_board)[:5]
+
+
+def test_print_results_limit():
+    board = wordhunt.wordhunt.Board.from_letters("nahzuxtskdyxpaus", 4, 4)
+    res = board.print_results(3)
+
+    assert res.splitlines()[0] == "3, 2 - thanx"
+    assert len(res.splitlines()) == 3
+
+
+def test_parallel_matches_serial():
+    letters = "".join(random.choices(string.ascii_lowercase, k=36))
+    board = wordhunt.wordhunt.Board.from_letters(letters, 6, 6)
+
+    assert (
+        wordhunt.wordhunt.trie_possibilities(board, parallel=True)
+        == wordhunt.wordhunt.trie_possibilities(board, parallel=False)
+    )
+
+
+def test_solve_many_cache():
+    letters = "".join(random.choices(string.ascii_lowercase, k=16))
+    boards = [
+        wordhunt.wordhunt.Board.from_letters(letters, 4, 4),
+        wordhunt.wordhunt.Board.from_letters(letters.upper(), 4, 4),
+    ]
+    hits = wordhunt.wordhunt.solve_cache_info().hits
+
+    first, second = wordhunt.wordhunt.solve_many(boards)
+
+    assert first == second == boards[0].solve()
+    assert wordhunt.wordhunt.solve_cache_info().hits == hits + 1
+
+
+def test_handler_rows():
+    res = wordhunt.handler(content="nahz uxts\nkdyx paus", options={})
+
+    assert "thanx" in res
+
+
+@pytest.mark.parametrize("size", [4, 6, 8, 9])
+def test_backend_parity(cy_wordhunt, size):
+    letters = "".join(random.choices(string.ascii_lowercase, k=size * size))
+    pure_board = pure_wordhunt.Board.from_letters(letters, size, size)
+    cy_board = cy_wordhunt.Board.from_letters(letters, size, size)
+
+    assert cy_board.solve(parallel=False) == pure_board.solve(parallel=False)
+
+
+def test_backend_parity_word_lengths(cy_wordhunt):
+    letters = "".join(random.choices(string.ascii_lowercase, k=25))
+    pure_board = pure_wordhunt.Board.from_letters(letters, 5, 5, min_len=2, max_len=5)
+    cy_board = cy_wordhunt.Board.from_letters(letters, 5, 5, min_len=2, max_len=5)
+
+    assert cy_board.solve() == pure_board.solve()
+    assert cy_board.print_results(5) == pure_board.print_results(5)